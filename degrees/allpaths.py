@@ -0,0 +1,132 @@
+"""
+Every shortest path, or the k best paths, between two people.
+
+One breadth-first search outward from the target gives each person's
+distance to it. Paths are then walked forward from the source, only
+ever stepping to a co-star whose remaining distance still fits in the
+length being enumerated, so every path comes out of the same search
+and paths are produced lazily, one at a time.
+"""
+
+from collections import deque
+
+import degrees
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that
+    connects the source to the target, one at a time. Yields nothing
+    if they are not connected.
+    """
+    start = degrees.person_node(source)
+    goal = degrees.person_node(target)
+    neighbors = degrees.search_neighbors()
+    distances = distances_to(goal, neighbors, stop=start)
+    if start not in distances:
+        return
+    for path in walk(start, distances[start], distances, neighbors, set()):
+        yield degrees.path_ids(path)
+
+
+def k_shortest_paths(source, target, k, diverse=True, max_extra=2):
+    """
+    Yields up to `k` paths from the source to the target in order of
+    length: every shortest path first, then paths one person longer,
+    and so on up to `max_extra` more than the shortest. Longer paths
+    never repeat a person.
+
+    With `diverse`, paths that share no movie with a path already
+    yielded go first within each length; the others are held back,
+    up to `k` of them, and only used to make up the count.
+    """
+    start = degrees.person_node(source)
+    goal = degrees.person_node(target)
+    neighbors = degrees.search_neighbors()
+    shortest = distances_to(goal, neighbors, stop=start).get(start)
+    if shortest is None or k <= 0:
+        return
+
+    # Exact distances up to the longest length enumerated
+    depth = shortest + max_extra
+    distances = distances_to(goal, neighbors, max_depth=depth)
+
+    count = 0
+    used_movies = set()
+    for length in range(shortest, depth + 1):
+        held = []
+        for path in walk(start, length, distances, neighbors, {start},
+                         exact=length == shortest, depth=depth):
+            movies = {movie for movie, _ in path}
+            if diverse and movies & used_movies:
+                if len(held) < k - count:
+                    held.append(path)
+                continue
+            used_movies |= movies
+            yield degrees.path_ids(path)
+            count += 1
+            if count == k:
+                return
+        for path in held:
+            used_movies.update(movie for movie, _ in path)
+            yield degrees.path_ids(path)
+            count += 1
+            if count == k:
+                return
+
+
+def distances_to(goal, neighbors, stop=None, max_depth=None):
+    """
+    Returns a dictionary of breadth-first distances from `goal`.
+
+    The search ends once `stop` has been reached, since every person
+    at a smaller distance then has theirs, or after `max_depth` levels.
+    """
+    distances = {goal: 0}
+    frontier = deque([goal])
+    while frontier:
+        state = frontier.popleft()
+        if state == stop:
+            break
+        distance = distances[state] + 1
+        if max_depth is not None and distance > max_depth:
+            break
+        for _, neighbor in neighbors(state):
+            if neighbor not in distances:
+                distances[neighbor] = distance
+                frontier.append(neighbor)
+    return distances
+
+
+def walk(state, remaining, distances, neighbors, visited, exact=True, depth=None):
+    """
+    Yields every path of exactly `remaining` steps from `state` to the
+    person at distance 0, as lists of (movie, person) search states.
+
+    When `exact`, each step must go one closer to the goal, which only
+    ever gives shortest paths. Otherwise any step may be taken whose
+    known distance to the goal, or `depth` + 1 if it is beyond the
+    searched depth, still fits, skipping people in `visited`.
+    """
+    if remaining == 0:
+        if distances.get(state) == 0:
+            yield []
+        return
+
+    for movie, neighbor in neighbors(state):
+        if exact:
+            if distances.get(neighbor) != remaining - 1:
+                continue
+        else:
+            if neighbor in visited:
+                continue
+            if distances.get(neighbor, depth + 1) > remaining - 1:
+                continue
+            visited.add(neighbor)
+
+        for rest in walk(neighbor, remaining - 1, distances, neighbors,
+                         visited, exact, depth):
+            yield [(movie, neighbor)] + rest
+
+        if not exact:
+            visited.discard(neighbor)
@@ -0,0 +1,162 @@
+"""
+Batch degrees-of-separation queries.
+
+Reads (source, target) person ID pairs, one per line separated by
+whitespace or a comma, from a file or standard input, and writes one
+JSON object per pair to standard output. Pairs that share a source are
+answered from a single search outward from that source, and targets in
+another connected component (see components.py) without any search.
+Malformed lines are skipped, each reported first as a JSON object
+with its line number and the error.
+
+With --workers, source groups are sharded across a process pool. Workers
+memory-map the dataset's snapshot (compiled first if needed), so the graph
+is shared through the page cache rather than pickled to each worker.
+"""
+
+import argparse
+import itertools
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import degrees
+from snapshot import compile_snapshot, load_snapshot
+
+# Most source groups sent to a worker at a time; fewer are sent when
+# needed to give every worker several tasks to balance load with
+GROUPS_PER_TASK = 16
+
+
+def read_pairs(lines, errors):
+    """
+    Yields (source, target) pairs, skipping blank lines and # comments.
+    Malformed lines are skipped too, with an error result for each
+    appended to `errors`.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        fields = line.replace(",", " ").split()
+        if len(fields) != 2:
+            errors.append({"line": number,
+                           "error": f"expected two person IDs, got: {line}"})
+            continue
+        yield fields[0], fields[1]
+
+
+def group_by_source(pairs):
+    """
+    Returns a dictionary mapping each source to its targets,
+    both in the order they were first seen.
+    """
+    groups = {}
+    for source, target in pairs:
+        groups.setdefault(source, {})[target] = None
+    return {source: list(targets) for source, targets in groups.items()}
+
+
+def answer_group(source, targets):
+    """
+    Returns a result dictionary for every target of one source.
+    """
+    try:
+        paths = degrees.shortest_paths_from(source, targets)
+    except KeyError:
+        # Fall back to per-pair answers to report which ID is unknown
+        return [answer_pair(source, target) for target in targets]
+    return [result(source, target, paths[target]) for target in targets]
+
+
+def answer_groups(groups):
+    """
+    Returns the results for a list of (source, targets) groups, in order.
+    """
+    answers = []
+    for source, targets in groups:
+        answers.extend(answer_group(source, targets))
+    return answers
+
+
+def init_worker(directory):
+    degrees.load_data(directory)
+    degrees.load_components(directory)
+
+
+def answer_parallel(directory, groups, workers):
+    """
+    Yields the results for every group, in order, computed across
+    a pool of worker processes that each load the directory's snapshot.
+    """
+    if load_snapshot(directory) is None:
+        compile_snapshot(directory)
+    # Label components once here, before the workers load them
+    degrees.load_data(directory)
+    degrees.load_components(directory)
+
+    size = max(1, min(GROUPS_PER_TASK, len(groups) // (workers * 4)))
+    groups = iter(groups.items())
+    chunks = iter(lambda: list(itertools.islice(groups, size)), [])
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(directory,)
+    ) as executor:
+        for answers in executor.map(answer_groups, chunks):
+            yield from answers
+
+
+def answer_pair(source, target):
+    try:
+        paths = degrees.shortest_paths_from(source, [target])
+    except KeyError as e:
+        return {"source": source, "target": target,
+                "error": f"unknown person: {e.args[0]}"}
+    return result(source, target, paths[target])
+
+
+def result(source, target, path):
+    return {
+        "source": source,
+        "target": target,
+        "degrees": None if path is None else len(path),
+        "path": path,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python batch.py [directory] [pairs] [--workers N]"
+    )
+    parser.add_argument("directory", nargs="?", default="small")
+    parser.add_argument("pairs", nargs="?", default="-",
+                        help="file of person ID pairs, or - for stdin")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes (default 1)")
+    args = parser.parse_args()
+
+    errors = []
+    if args.pairs == "-":
+        groups = group_by_source(read_pairs(sys.stdin, errors))
+    else:
+        with open(args.pairs, encoding="utf-8") as f:
+            groups = group_by_source(read_pairs(f, errors))
+    for error in errors:
+        print(json.dumps(error), flush=True)
+
+    if args.workers > 1:
+        answers = answer_parallel(args.directory, groups, args.workers)
+    else:
+        degrees.load_data(args.directory)
+        degrees.load_components(args.directory)
+        answers = (
+            answer
+            for source, targets in groups.items()
+            for answer in answer_group(source, targets)
+        )
+
+    for answer in answers:
+        print(json.dumps(answer), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Benchmarks for loading and searching synthetic degrees datasets.
+
+Datasets are generated reproducibly from a seed in the same CSV schema
+as the real data. Casts are filled by preferential attachment: each
+role goes to someone picked in proportion to how many movies they are
+already in, or sometimes to anyone at all, which gives the heavy-tailed
+movies-per-person distribution of real film credits.
+
+For each size, the harness times loading (CSV into dictionaries, CSV
+into a CompactGraph, compiling and mapping a snapshot, and building the
+landmark index) and then, on the mapped snapshot, single queries with
+caches off and batch throughput with caches on for every strategy.
+Each query measurement stops after a time budget, so the slow
+strategies still finish on the largest graphs.
+
+Results are written as JSON so runs can be diffed between versions.
+
+Usage: python benchmark.py [--sizes 10k,100k,1M] [--output FILE]
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import degrees
+from landmarks import INDEX_NAME
+from snapshot import compile_snapshot
+
+STRATEGIES = ("bidirectional", "bfs", "landmarks")
+
+# Bumped whenever generation changes, so stale datasets are regenerated
+GENERATOR_VERSION = 1
+
+# Movies per person, and the weights of cast sizes 1, 2, ...
+MOVIES_PER_PERSON = 1 / 3
+CAST_WEIGHTS = (5, 10, 15, 25, 20, 12, 8, 5)
+
+# Chance a role goes to anyone rather than in proportion to their credits
+UNIFORM_CHOICE = 0.4
+
+SYLLABLES = ("ka", "lo", "mi", "ra", "den", "sa", "ton", "el", "vi", "mar",
+             "jo", "an", "be", "lu", "ste", "wen", "ri", "co", "na", "ber")
+
+
+def generate(directory, size, seed):
+    """
+    Writes a synthetic dataset of `size` people to `directory`.
+    """
+    rng = random.Random(f"{seed}:{size}")
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        f.write("id,name,birth\n")
+        for person in range(1, size + 1):
+            birth = rng.randint(1900, 2005) if rng.random() < 0.8 else ""
+            writer.writerow([person, person_name(rng), birth])
+
+    movie_count = max(1, int(size * MOVIES_PER_PERSON))
+    cast_sizes = range(1, len(CAST_WEIGHTS) + 1)
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as movies_file, \
+         open(os.path.join(directory, "stars.csv"), "w",
+              encoding="utf-8", newline="") as stars_file:
+        movies_writer = csv.writer(movies_file, quoting=csv.QUOTE_NONNUMERIC)
+        movies_file.write("id,title,year\n")
+        stars_file.write("person_id,movie_id\n")
+
+        # Every credit so far, so picking one uniformly picks a person
+        # in proportion to how many movies they are in
+        credits = []
+        for movie in range(1, movie_count + 1):
+            movies_writer.writerow(
+                [movie, f"Movie {movie}", rng.randint(1920, 2024)]
+            )
+            cast = set()
+            for _ in range(rng.choices(cast_sizes, CAST_WEIGHTS)[0]):
+                if not credits or rng.random() < UNIFORM_CHOICE:
+                    cast.add(rng.randint(1, size))
+                else:
+                    cast.add(rng.choice(credits))
+            for person in sorted(cast):
+                stars_file.write(f"{person},{movie}\n")
+                credits.append(person)
+
+    with open(os.path.join(directory, "params.json"), "w") as f:
+        json.dump(dataset_params(size, seed), f)
+
+
+def person_name(rng):
+    first = "".join(rng.choices(SYLLABLES, k=rng.randint(1, 2))).title()
+    last = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 3))).title()
+    return f"{first} {last}"
+
+
+def dataset_params(size, seed):
+    return {"people": size, "seed": seed, "generator": GENERATOR_VERSION}
+
+
+def prepare(data, size, seed):
+    """
+    Returns the directory of the dataset for `size` people,
+    generating it unless an identical one is already there.
+    """
+    directory = os.path.join(data, f"people-{size}")
+    try:
+        with open(os.path.join(directory, "params.json")) as f:
+            if json.load(f) == dataset_params(size, seed):
+                return directory
+    except (OSError, ValueError):
+        pass
+    log(f"Generating {size} people in {directory}...")
+    generate(directory, size, seed)
+    return directory
+
+
+def benchmark(directory, queries, budget, seed):
+    """
+    Returns the load and query timings for one dataset.
+    """
+    results = {"load": {}, "single": {}, "batch": {}}
+    load = results["load"]
+
+    log("Loading CSV files into dictionaries...")
+    load["csv_dict"] = timed(
+        lambda: degrees.load_data(directory, use_snapshot=False)
+    )
+    results["people"] = len(degrees.people)
+    results["movies"] = len(degrees.movies)
+    results["stars"] = sum(len(person["movies"]) for person in degrees.people.values())
+
+    log("Loading CSV files into a compact graph...")
+    load["csv_compact"] = timed(
+        lambda: degrees.load_data(directory, compact=True, use_snapshot=False)
+    )
+
+    log("Compiling and mapping the snapshot...")
+    load["snapshot_compile"] = timed(lambda: compile_snapshot(directory))
+    load["snapshot"] = timed(lambda: degrees.load_data(directory))
+
+    log("Building the landmark index...")
+    index_path = os.path.join(directory, INDEX_NAME)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    load["landmarks_build"] = timed(lambda: degrees.load_landmarks(directory))
+
+    rng = random.Random(seed)
+    pairs = sample_pairs(rng, queries)
+    for strategy in STRATEGIES:
+        log(f"Timing single {strategy} queries...")
+        degrees.configure_caches(neighbors=0, paths=0)
+        results["single"][strategy] = time_queries(
+            lambda source, target: degrees.shortest_path(source, target, strategy),
+            pairs, budget
+        )
+
+    # Batches repeat sources, as real query logs do, which caches exploit
+    sources = [source for source, _ in pairs[:max(1, len(pairs) // 10)]]
+    batch = [(rng.choice(sources), target) for _, target in pairs]
+    for strategy in STRATEGIES:
+        log(f"Timing batch {strategy} queries...")
+        degrees.configure_caches(neighbors=degrees.NEIGHBOR_CACHE_SIZE,
+                                 paths=degrees.PATH_CACHE_SIZE)
+        degrees.neighbor_cache.clear()
+        degrees.path_cache.clear()
+        results["batch"][strategy] = time_queries(
+            lambda source, target: degrees.shortest_path(source, target, strategy),
+            batch, budget
+        )
+
+    # Grouped queries answer each source's targets with one search, so
+    # their latencies are per source but their throughput per query
+    log("Timing grouped batch queries...")
+    degrees.configure_caches(neighbors=0, paths=0)
+    groups = {}
+    for source, target in batch:
+        groups.setdefault(source, []).append(target)
+    results["batch"]["grouped"] = time_queries(
+        lambda source, targets: degrees.shortest_paths_from(source, targets),
+        list(groups.items()), budget, weights=[len(t) for t in groups.values()]
+    )
+    degrees.configure_caches(neighbors=degrees.NEIGHBOR_CACHE_SIZE,
+                             paths=degrees.PATH_CACHE_SIZE)
+    return results
+
+
+def sample_pairs(rng, count):
+    """
+    Returns `count` random pairs of person IDs from the loaded
+    graph, choosing only people who are in at least one movie.
+    """
+    graph = degrees.graph
+    offsets = graph.person_offsets
+    credited = [
+        i for i in range(len(graph.person_ids)) if offsets[i + 1] > offsets[i]
+    ]
+    return [
+        (graph.person_ids[rng.choice(credited)],
+         graph.person_ids[rng.choice(credited)])
+        for _ in range(count)
+    ]
+
+
+def time_queries(run, items, budget, weights=None):
+    """
+    Calls `run` on each item in turn until they are all done or `budget`
+    seconds have passed, and returns throughput and latency figures.
+    With `weights`, each item counts as that many queries.
+    """
+    latencies = []
+    answered = 0
+    started = time.perf_counter()
+    for i, item in enumerate(items):
+        before = time.perf_counter()
+        run(*item)
+        latencies.append(time.perf_counter() - before)
+        answered += 1 if weights is None else weights[i]
+        if before - started + latencies[-1] > budget:
+            break
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "queries": answered,
+        "seconds": round(elapsed, 6),
+        "queries_per_second": round(answered / elapsed, 3) if elapsed else None,
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 3),
+        "p50_ms": round(1000 * percentile(latencies, 50), 3),
+        "p95_ms": round(1000 * percentile(latencies, 95), 3),
+        "max_ms": round(1000 * latencies[-1], 3),
+        "complete": len(latencies) == len(items),
+    }
+
+
+def percentile(ordered, percent):
+    index = round(percent / 100 * (len(ordered) - 1))
+    return ordered[index]
+
+
+def timed(load):
+    started = time.perf_counter()
+    load()
+    return round(time.perf_counter() - started, 6)
+
+
+def parse_size(text):
+    """
+    Parses a people count such as 10000, 10k or 1M.
+    """
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    text = text.strip().lower()
+    try:
+        if text and text[-1] in multipliers:
+            return int(float(text[:-1]) * multipliers[text[-1]])
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {text}")
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python benchmark.py [--sizes 10k,100k,1M] [--queries N] "
+              "[--budget SECONDS] [--seed N] [--data DIR] [--output FILE]"
+    )
+    parser.add_argument("--sizes", default="10k,100k,1M",
+                        type=lambda text: [parse_size(s) for s in text.split(",")],
+                        help="comma-separated numbers of people")
+    parser.add_argument("--queries", type=int, default=200,
+                        help="queries per measurement (default 200)")
+    parser.add_argument("--budget", type=float, default=30.0,
+                        help="most seconds spent on each query measurement")
+    parser.add_argument("--seed", type=int, default=50)
+    parser.add_argument("--data", default="benchmark-data",
+                        help="where generated datasets are kept")
+    parser.add_argument("--output", help="write results here, not stdout")
+    args = parser.parse_args()
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "queries": args.queries,
+        "budget": args.budget,
+        "datasets": [],
+    }
+    for size in args.sizes:
+        directory = prepare(args.data, size, args.seed)
+        log(f"Benchmarking {directory}...")
+        results = benchmark(directory, args.queries, args.budget, args.seed)
+        report["datasets"].append({"size": size, **results})
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Connected components of people, labelled with union-find.
+
+Components are found in a single streaming pass over stars.csv, in
+which each person is joined to the first person seen in each of their
+movies. The same pass counts how many movies each person starred in
+and how many people each movie has. Like loader.read_dataset, it skips
+stars rows whose person or movie is not in people.csv or movies.csv,
+so the components are those of the graph load_data builds.
+"""
+
+from array import array
+from collections import Counter
+
+from loader import LoadReport, read_rows
+from tables import load_index, write_index
+
+MAGIC = b"DEGCOMP\0"
+VERSION = 2
+INDEX_NAME = "components.idx"
+
+
+class ComponentIndex():
+    """
+    Connected-component label of every person, by rank in sorted
+    person-ID order. Components are numbered from the largest down.
+    `ranks` translates search states to ranks; None means states
+    already are ranks.
+    """
+
+    def __init__(self, labels, sizes, ranks=None):
+        self.labels = labels
+        self.sizes = sizes
+        self.ranks = ranks
+
+    def component(self, state):
+        return self.labels[state if self.ranks is None else self.ranks[state]]
+
+    def connected(self, a, b):
+        """
+        Returns whether two states are in the same component.
+        """
+        return self.component(a) == self.component(b)
+
+    def save(self, path, fingerprint):
+        write_index(path, MAGIC, VERSION, {"sources": fingerprint}, [
+            ("labels", self.labels, "i"),
+            ("sizes", self.sizes, "i"),
+        ])
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """
+        Memory-maps an index from `path`, or returns None if it is
+        missing, unreadable or was built from different data.
+        """
+        loaded = load_index(path, MAGIC, VERSION, fingerprint)
+        if loaded is None:
+            return None
+        _, sections = loaded
+        return cls(sections["labels"], sections["sizes"])
+
+
+def label_components(directory):
+    """
+    Streams a dataset's CSV files once and returns its ComponentIndex,
+    the histogram of how many movies people starred in and the
+    histogram of how many people movies have.
+    """
+    report = LoadReport()
+    person_ids = sorted({
+        row[0] for row in read_rows(
+            directory, "people", ("id", "name", "birth"), report
+        )
+    })
+    ranks = {person_id: rank for rank, person_id in enumerate(person_ids)}
+    del person_ids
+    movie_ids = {
+        row[0] for row in read_rows(
+            directory, "movies", ("id", "title", "year"), report
+        )
+    }
+
+    parent = array("i", range(len(ranks)))
+    size = array("i", [1]) * len(ranks)
+    movie_counts = array("i", [0]) * len(ranks)
+    # Maps each movie to the first person seen in it and its cast size
+    casts = {}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for person_id, movie_id in read_rows(
+        directory, "stars", ("person_id", "movie_id"), report
+    ):
+        rank = ranks.get(person_id)
+        if rank is None or movie_id not in movie_ids:
+            continue
+        movie_counts[rank] += 1
+        if movie_id not in casts:
+            casts[movie_id] = [rank, 1]
+            continue
+        cast = casts[movie_id]
+        cast[1] += 1
+        a, b = find(rank), find(cast[0])
+        if a != b:
+            if size[a] < size[b]:
+                a, b = b, a
+            parent[b] = a
+            size[a] += size[b]
+    del ranks, movie_ids
+
+    # Number components densely, largest first
+    roots = Counter(find(x) for x in range(len(parent)))
+    numbering = {
+        root: label for label, (root, _) in enumerate(roots.most_common())
+    }
+    labels = array("i", (numbering[find(x)] for x in range(len(parent))))
+    sizes = array("i", (count for _, count in roots.most_common()))
+
+    degrees = Counter(movie_counts)
+    cast_sizes = Counter(cast[1] for cast in casts.values())
+    return ComponentIndex(labels, sizes), degrees, cast_sizes
@@ -1,7 +1,19 @@
-import csv
+import argparse
+import heapq
+import math
+import os
 import sys
+import time
+from collections import deque
 
-from util import Node, StackFrontier, QueueFrontier
+from cache import MISSING, LRUCache
+from components import INDEX_NAME as COMPONENTS_NAME, ComponentIndex, label_components
+from graph import CompactGraph
+from landmarks import DEFAULT_COUNT, INDEX_NAME, LandmarkIndex
+from loader import filters_key, read_dataset
+from nameindex import NameIndex
+from snapshot import load_snapshot, source_fingerprint
+from util import ParentArrays, ParentTable, SearchStats
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,54 +24,156 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# NameIndex over `people` for prefix and fuzzy searches, see find_people
+name_index = None
 
-def load_data(directory):
+# CompactGraph holding the whole dataset when loaded compactly or from a snapshot
+graph = None
+
+# Filters the data was loaded with, as given by loader.filters_key
+data_filters = None
+
+# LandmarkIndex over the loaded data, see load_landmarks
+landmarks = None
+
+# ComponentIndex over the loaded data, see load_components
+components = None
+
+# ParentTables reused by every search, see parent_tables
+search_tables = []
+
+# Default number of entries kept by each cache, see configure_caches
+NEIGHBOR_CACHE_SIZE = 4096
+PATH_CACHE_SIZE = 1024
+
+# Fewest movies a person must be in for their neighbors to be cached
+HUB_MOVIES = 16
+
+# Maps hub search states to the (movie, person) pairs they expand to
+neighbor_cache = LRUCache(NEIGHBOR_CACHE_SIZE)
+
+# Maps (source, target) person_ids, in sorted order, to their shortest path
+path_cache = LRUCache(PATH_CACHE_SIZE)
+
+
+class SearchLimitExceeded(Exception):
+    """
+    Raised when a search expands more people than its budget allows.
+    """
+
+
+def load_data(directory, compact=False, use_snapshot=True,
+              years=None, person_ids=None):
     """
     Load data from CSV files into memory.
+
+    If the directory has an up-to-date snapshot (see snapshot.py),
+    it is memory-mapped instead and the CSV files are not read.
+    With `compact`, the data is kept in an integer-indexed CompactGraph
+    instead of the `names`, `people` and `movies` dictionaries.
+
+    `years` (an inclusive range of movie years) and `person_ids` limit
+    what is loaded, as described in `loader.read_dataset`; filtered
+    loads always read the CSV files.
+
+    Returns a LoadReport of the rows read, or None for a snapshot.
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    global graph, landmarks, components, data_filters, name_index
+    search_tables.clear()
+    landmarks = None
+    components = None
+    neighbor_cache.clear()
+    path_cache.clear()
+    names.clear()
+    people.clear()
+    movies.clear()
+    name_index = None
+    data_filters = filters_key(years, person_ids)
+
+    if use_snapshot and data_filters is None:
+        graph = load_snapshot(directory)
+        if graph is not None:
+            return None
+    if compact:
+        graph, report = CompactGraph.from_csv(directory, years, person_ids)
+        return report
+    graph = None
+
+    report = read_dataset(directory, load_people, load_movies, load_stars,
+                          years, person_ids)
+
+    # Index names, ranking people in sorted ID order as the compact backend does
+    ids = sorted(people)
+    name_index = NameIndex.build(ids, [people[person_id]["name"] for person_id in ids])
+
+    return report
+
+
+def load_people(rows):
+    """
+    Adds (id, name, birth) rows to `people` and `names`.
+    """
+    for person_id, name, birth in rows:
+        people[person_id] = {
+            "name": name,
+            "birth": birth,
+            "movies": set()
+        }
+        if name.lower() not in names:
+            names[name.lower()] = {person_id}
+        else:
+            names[name.lower()].add(person_id)
+
+
+def load_movies(rows):
+    """
+    Adds (id, title, year) rows to `movies`.
+    """
+    for movie_id, title, year in rows:
+        movies[movie_id] = {
+            "title": title,
+            "year": year,
+            "stars": set()
+        }
+
+
+def load_stars(rows):
+    """
+    Links the people and movies of (person_id, movie_id) rows.
+    """
+    for person_id, movie_id in rows:
+        people[person_id]["movies"].add(movie_id)
+        movies[movie_id]["stars"].add(person_id)
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "small"
+    parser = argparse.ArgumentParser(
+        usage="python degrees.py [directory] [--compact] [--years FIRST-LAST] "
+              "[--strategy STRATEGY] [--stats]"
+    )
+    parser.add_argument("directory", nargs="?", default="small")
+    parser.add_argument("--compact", action="store_true",
+                        help="keep the data in an integer-indexed graph")
+    parser.add_argument("--years", type=year_range,
+                        help="only load movies from these years, e.g. 1990-1999")
+    parser.add_argument("--strategy", default="bidirectional",
+                        choices=["bidirectional", "bfs", "landmarks"])
+    parser.add_argument("--stats", action="store_true",
+                        help="print search statistics for the query")
+    args = parser.parse_args()
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    report = load_data(args.directory, compact=args.compact, years=args.years)
+    if report is not None and (args.years or report.orphaned
+                               or any(report.malformed.values())):
+        print(report)
+    if args.years is None:
+        # Lets people in separate components be answered without a search,
+        # if batch.py, server.py or stats.py has labelled them already
+        load_components(args.directory, build=False)
+    if args.strategy == "landmarks":
+        load_landmarks(args.directory)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,7 +183,10 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    stats = SearchStats() if args.stats else None
+    path = shortest_path(source, target, args.strategy, stats=stats)
+    if stats is not None:
+        print(f"Search: {stats}")
 
     if path is None:
         print("Not connected.")
@@ -78,60 +195,555 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_record(path[i][1])["name"]
+            person2 = person_record(path[i + 1][1])["name"]
+            movie = movie_record(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def explore_node(frontier: StackFrontier, explored_set: set, target: str):
-    # repeat...
-    # if the frontier is empty, then no solution
-    if frontier.empty():
-        return None
-    
-    # remove a node from the frontier
-    node = frontier.remove()
-    person_id = node.state
-    
-    # if node is goal, return solution
-    if person_id == target:
-        path = []
-        while node.parent is not None:
-            path.append(node.action)
-            node = node.parent
-        path.reverse()
-        return path
-    
-    # add the node to the explored set
-    explored_set.add(person_id)
-    
-    # add resulting nodes to the frontier if they are not in the frontier or the explored set
-    neighbors = neighbors_for_person(person_id)
-    for movie_id, neighbor_id in neighbors:
-        if neighbor_id not in explored_set:
-            new_node = Node(neighbor_id, node, (movie_id, neighbor_id))
-            frontier.add(new_node)
-    
-    return explore_node(frontier, explored_set, target)
-        
-
-def shortest_path(source, target):
+def year_range(text):
+    """
+    Parses a "FIRST-LAST" command-line year range into a tuple.
+    """
+    try:
+        first, last = (int(year) for year in text.split("-"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid year range: {text}")
+    return first, last
+
+
+def breadth_first_search(source, target, neighbors=None, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, expanding one
+    frontier outward from the source.
+
+    `neighbors` maps a person to their (movie, person) pairs and
+    defaults to `neighbors_for_person`. A SearchStats given as
+    `stats` is kept up to date as the search goes.
+
+    If no possible path, returns None.
+    """
+    if neighbors is None:
+        neighbors = neighbors_for_person
+
+    # Record how each person was first reached, which also marks
+    # them so they are never added to the frontier twice
+    tree, = parent_tables(1)
+    generation = tree.reset()
+    parent, movie, stamp = tree.parent, tree.movie, tree.stamp
+    stamp_of = tree.stamp_of
+    stamp[source] = generation
+    frontier = deque([source])
+    reached = 0
+
+    # repeat until the frontier is empty, then there is no solution
+    while frontier:
+        person_id = frontier.popleft()
+
+        # if person is goal, return solution
+        if person_id == target:
+            return tree.path(target, source)
+
+        for movie_id, neighbor_id in neighbors(person_id):
+            if stamp_of(neighbor_id) == generation:
+                continue
+            stamp[neighbor_id] = generation
+            parent[neighbor_id] = person_id
+            movie[neighbor_id] = movie_id
+            frontier.append(neighbor_id)
+            reached += 1
+
+        if stats is not None:
+            stats.observe(len(frontier), reached)
+
+    return None
+
+
+def bidirectional_search(source, target, neighbors=None, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, growing one frontier
+    from each end and stopping as soon as they meet.
+
+    `neighbors` and `stats` are as for `breadth_first_search`.
+
+    If no possible path, returns None.
+    """
+    if neighbors is None:
+        neighbors = neighbors_for_person
+    if source == target:
+        return []
+
+    # How each person was reached from either end
+    forward, backward = parent_tables(2)
+    forward.stamp[source] = forward.reset()
+    backward.stamp[target] = backward.reset()
+    forward_frontier = [source]
+    backward_frontier = [target]
+    reached = 0
+
+    while forward_frontier and backward_frontier:
+        # Always expand the smaller side, one whole level at a time
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand_level(
+                forward_frontier, forward, backward, neighbors
+            )
+            reached += len(forward_frontier)
+        else:
+            backward_frontier, meeting = expand_level(
+                backward_frontier, backward, forward, neighbors
+            )
+            reached += len(backward_frontier)
+        if stats is not None:
+            stats.observe(len(forward_frontier) + len(backward_frontier),
+                          reached + (meeting is not None))
+        if meeting is not None:
+            return join_paths(meeting, source, target, forward, backward)
+
+    return None
+
+
+def expand_level(frontier, tree, other_tree, neighbors):
+    """
+    Expands every person in the frontier by one step, recording
+    how each newly reached person was reached in `tree`.
+
+    Returns the next frontier and the first person already reached
+    in `other_tree`, or None if the two searches did not meet.
+    """
+    generation = tree.generation
+    parent, movie, stamp = tree.parent, tree.movie, tree.stamp
+    stamp_of = tree.stamp_of
+    other_generation = other_tree.generation
+    other_stamp_of = other_tree.stamp_of
+
+    next_frontier = []
+    for person_id in frontier:
+        for movie_id, neighbor_id in neighbors(person_id):
+            if stamp_of(neighbor_id) == generation:
+                continue
+            stamp[neighbor_id] = generation
+            parent[neighbor_id] = person_id
+            movie[neighbor_id] = movie_id
+            if other_stamp_of(neighbor_id) == other_generation:
+                return next_frontier, neighbor_id
+            next_frontier.append(neighbor_id)
+    return next_frontier, None
+
+
+def join_paths(meeting, source, target, forward, backward):
+    """
+    Builds the source-to-target path through the person
+    where the forward and backward searches met.
+    """
+    path = forward.path(meeting, source)
+
+    person_id = meeting
+    while person_id != target:
+        movie_id, child_id = backward.movie[person_id], backward.parent[person_id]
+        path.append((movie_id, child_id))
+        person_id = child_id
+    return path
+
+
+def shortest_path(source, target, strategy="bidirectional", max_expanded=None,
+                  stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    `strategy` is "bidirectional" (the default), "bfs" for the
+    plain one-sided breadth-first search, or "landmarks" for an A*
+    search guided by the index from `load_landmarks`.
+    With `max_expanded`, raises SearchLimitExceeded if the search
+    expands more than that many people before finding an answer.
+    A SearchStats given as `stats` is filled in for this query.
+
     If no possible path, returns None.
     """
-    
-    # starts with a frontier that contains initial state
-    frontier = QueueFrontier()
-    initial_state = Node(source, None, None)
-    frontier.add(initial_state)
-    # start with an empty explored set
-    explored_set: set = set()
-    
-    return explore_node(frontier, explored_set, target)
+    if strategy == "bidirectional":
+        search = bidirectional_search
+    elif strategy == "bfs":
+        search = breadth_first_search
+    elif strategy == "landmarks":
+        search = landmark_search
+    else:
+        raise ValueError(f"Unknown search strategy: {strategy}")
+
+    if stats is None:
+        return cached_path(source, target, search, max_expanded)
+
+    stats.strategy = strategy
+    started = time.perf_counter()
+    try:
+        path = cached_path(source, target, search, max_expanded, stats)
+    finally:
+        stats.elapsed = time.perf_counter() - started
+    stats.degrees = None if path is None else len(path)
+    return path
+
+
+def cached_path(source, target, search, max_expanded=None, stats=None):
+    """
+    Answers a shortest_path query from the path cache or with `search`.
+    """
+    # A path answers its reverse query too, so cache under one ordering
+    forward = source <= target
+    key = (source, target) if forward else (target, source)
+    path = path_cache.get(key)
+    if path is not MISSING:
+        if stats is not None:
+            stats.cached = True
+        if path is None or forward:
+            return None if path is None else list(path)
+        return reverse_path(target, path)
+
+    start = person_node(source)
+    goal = person_node(target)
+    if components is not None and not components.connected(start, goal):
+        path = None
+    else:
+        neighbors = search_neighbors()
+        if max_expanded is not None:
+            neighbors = limit_expansions(neighbors, max_expanded)
+        if stats is not None:
+            neighbors = stats.counting(neighbors)
+        path = path_ids(search(start, goal, neighbors, stats))
+    if path is None or forward:
+        path_cache.put(key, None if path is None else tuple(path))
+    else:
+        path_cache.put(key, tuple(reverse_path(source, path)))
+    return path
+
+
+def reverse_path(source, path):
+    """
+    Returns the path from the end of `path` back to its source.
+    """
+    people_on_path = [source] + [person_id for _, person_id in path]
+    return [
+        (path[i][0], people_on_path[i])
+        for i in range(len(path) - 1, -1, -1)
+    ]
+
+
+def landmark_search(source, target, neighbors=None, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, using A* with the
+    landmark lower bounds as heuristic and pruning every state
+    the landmark upper bound rules out.
+
+    `neighbors` and `stats` are as for `breadth_first_search`.
+
+    If no possible path, returns None.
+    """
+    if landmarks is None:
+        raise RuntimeError("landmark index not loaded, call load_landmarks")
+    if neighbors is None:
+        neighbors = neighbors_for_person
+    if source == target:
+        return []
+
+    lower, upper = landmarks.bounds(source, target)
+    if lower == math.inf:
+        return None
+    estimate = landmarks.heuristic(target)
+
+    # Costs mark the reached states; the tree only records how
+    tree, = parent_tables(1)
+    tree.reset()
+    parent, movie = tree.parent, tree.movie
+    costs = {source: 0}
+    # Ties on estimated total go to the deeper state, which is closer to done
+    queue = [(estimate(source), 0, source)]
+    while queue:
+        _, depth, state = heapq.heappop(queue)
+        cost = -depth
+        if state == target:
+            return tree.path(target, source)
+        if cost > costs[state]:
+            continue
+
+        for movie_id, neighbor in neighbors(state):
+            if neighbor in costs and costs[neighbor] <= cost + 1:
+                continue
+            total = cost + 1 + estimate(neighbor)
+            if total > upper:
+                continue
+            costs[neighbor] = cost + 1
+            parent[neighbor] = state
+            movie[neighbor] = movie_id
+            heapq.heappush(queue, (total, -(cost + 1), neighbor))
+
+        if stats is not None:
+            stats.observe(len(queue), len(costs) - 1)
+
+    return None
+
+
+def single_source_paths(source, targets, neighbors=None):
+    """
+    Returns a dictionary mapping each of the targets to its shortest
+    list of (movie_id, person_id) pairs from the source, or None if
+    it is not connected, using a single breadth-first search that
+    stops once every target has been reached.
+
+    `neighbors` is as for `breadth_first_search`.
+    """
+    if neighbors is None:
+        neighbors = neighbors_for_person
+
+    # People without any movie can never be reached, so they must not
+    # keep the search running until the whole component is exhausted
+    remaining = {
+        target for target in targets
+        if target != source and next(iter(neighbors(target)), None) is not None
+    }
+    tree, = parent_tables(1)
+    generation = tree.reset()
+    parent, movie, stamp = tree.parent, tree.movie, tree.stamp
+    stamp_of = tree.stamp_of
+    stamp[source] = generation
+    frontier = deque([source])
+    while frontier and remaining:
+        person_id = frontier.popleft()
+        for movie_id, neighbor_id in neighbors(person_id):
+            if stamp_of(neighbor_id) == generation:
+                continue
+            stamp[neighbor_id] = generation
+            parent[neighbor_id] = person_id
+            movie[neighbor_id] = movie_id
+            remaining.discard(neighbor_id)
+            frontier.append(neighbor_id)
+
+    paths = {}
+    for target in targets:
+        if stamp_of(target) == generation:
+            paths[target] = tree.path(target, source)
+        else:
+            paths[target] = None
+    return paths
+
+
+def shortest_paths_from(source, targets):
+    """
+    Returns a dictionary mapping each target person ID to the
+    shortest list of (movie_id, person_id) pairs from the source,
+    or None if not connected, sharing one search across all targets.
+    """
+    start = person_node(source)
+    nodes = {target: person_node(target) for target in targets}
+    reachable = {
+        node for node in nodes.values()
+        if components is None or components.connected(start, node)
+    }
+    paths = single_source_paths(start, reachable, search_neighbors())
+    return {
+        target: path_ids(paths.get(node)) for target, node in nodes.items()
+    }
+
+
+def load_landmarks(directory, count=DEFAULT_COUNT):
+    """
+    Loads the landmark index stored beside the data in `directory`,
+    first building it from `count` landmarks and saving it if it is
+    missing or the CSV files have changed since it was built. Data
+    loaded with filters gets an index built in memory only, so the
+    stored one always covers the whole dataset.
+
+    Must be called after `load_data` for the same directory.
+    """
+    global landmarks
+    path = os.path.join(directory, INDEX_NAME)
+    fingerprint = source_fingerprint(directory)
+    index = None
+    if data_filters is None:
+        index = LandmarkIndex.load(path, fingerprint)
+
+    if graph is not None:
+        ranks = None
+        size = len(graph.person_ids)
+        neighbors = graph.neighbors
+        offsets = graph.person_offsets
+        degree = lambda rank: offsets[rank + 1] - offsets[rank]
+    else:
+        # Rank people in sorted ID order, as the compact backend does
+        ids = sorted(people)
+        ranks = {person_id: rank for rank, person_id in enumerate(ids)}
+        size = len(ids)
+        neighbors = lambda rank: (
+            (movie_id, ranks[person_id])
+            for movie_id, person_id in neighbors_for_person(ids[rank])
+        )
+        degree = lambda rank: len(people[ids[rank]]["movies"])
+
+    if index is None:
+        index = LandmarkIndex.build(size, neighbors, degree, count)
+        if data_filters is None:
+            try:
+                index.save(path, fingerprint)
+            except OSError:
+                # A read-only dataset still gets the index in memory
+                pass
+    index.ranks = ranks
+    landmarks = index
+
+
+def load_components(directory, build=True):
+    """
+    Loads the connected-component labels stored beside the data in
+    `directory`, first labelling them in one pass over the CSV files
+    and saving them if they are missing or out of date. Once loaded,
+    queries between people in different components are answered
+    without searching.
+
+    Without `build`, only labels already saved and up to date are
+    used, and queries simply search if there are none.
+
+    Must be called after an unfiltered `load_data` for the same directory.
+    """
+    global components
+    if data_filters is not None:
+        raise RuntimeError("components are only kept for the whole dataset")
+    path = os.path.join(directory, COMPONENTS_NAME)
+    fingerprint = source_fingerprint(directory)
+    index = ComponentIndex.load(path, fingerprint)
+    if index is None:
+        if not build:
+            return
+        index, _, _ = label_components(directory)
+        try:
+            index.save(path, fingerprint)
+        except OSError:
+            # A read-only dataset still gets the labels in memory
+            pass
+    if graph is None:
+        # Rank people in sorted ID order, as the compact backend does
+        index.ranks = {
+            person_id: rank for rank, person_id in enumerate(sorted(people))
+        }
+    components = index
+
+
+def degree_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two person IDs in O(K) from the landmark index, without searching.
+
+    Both bounds are math.inf if the two are known not to be connected.
+    """
+    if landmarks is None:
+        raise RuntimeError("landmark index not loaded, call load_landmarks")
+    return landmarks.bounds(person_node(source), person_node(target))
+
+
+def person_node(person_id):
+    """
+    Returns the search state standing for a person ID in the
+    loaded backend, raising KeyError if the person is unknown.
+    """
+    if graph is not None:
+        return graph.person_index(person_id)
+    if person_id not in people:
+        raise KeyError(person_id)
+    return person_id
+
+
+def parent_tables(count):
+    """
+    Returns `count` ParentTables for a search to record its states in,
+    as reusable arrays when the states are compact graph indices.
+    """
+    while len(search_tables) < count:
+        if graph is not None:
+            search_tables.append(ParentArrays(len(graph.person_ids)))
+        else:
+            search_tables.append(ParentTable())
+    return search_tables[:count]
+
+
+def search_neighbors():
+    """
+    Returns the neighbor function searches should expand states with.
+    """
+    if neighbor_cache.maxsize > 0:
+        return cached_neighbors
+    if graph is not None:
+        return graph.neighbors
+    return neighbors_for_person
+
+
+def cached_neighbors(state):
+    """
+    Returns the (movie, person) pairs a search state expands to,
+    from the neighbor cache when they were expanded recently.
+
+    Only people in at least HUB_MOVIES movies are cached: a search
+    reaches far more people than the cache holds, so caching everyone
+    would evict each entry before it was reused, while the few hubs
+    are expanded by almost every search and cost the most to rebuild.
+    """
+    if graph is not None:
+        offsets = graph.person_offsets
+        if offsets[state + 1] - offsets[state] < HUB_MOVIES:
+            return graph.neighbors(state)
+    elif len(people[state]["movies"]) < HUB_MOVIES:
+        return neighbors_for_person(state)
+
+    pairs = neighbor_cache.get(state)
+    if pairs is MISSING:
+        if graph is not None:
+            pairs = tuple(graph.neighbors(state))
+        else:
+            pairs = tuple(neighbors_for_person(state))
+        neighbor_cache.put(state, pairs)
+    return pairs
+
+
+def limit_expansions(neighbors, limit):
+    """
+    Wraps a neighbor function to raise SearchLimitExceeded once
+    it has been called for more than `limit` states.
+    """
+    expanded = 0
+
+    def expand(state):
+        nonlocal expanded
+        expanded += 1
+        if expanded > limit:
+            raise SearchLimitExceeded(f"search expanded more than {limit} people")
+        return neighbors(state)
+
+    return expand
+
+
+def configure_caches(neighbors=None, paths=None):
+    """
+    Sets how many neighbor lists and paths are cached; 0 disables a cache.
+    """
+    if neighbors is not None:
+        neighbor_cache.resize(neighbors)
+    if paths is not None:
+        path_cache.resize(paths)
+
+
+def cache_stats():
+    """
+    Returns the size, capacity, hits and misses of each cache.
+    """
+    return {"neighbors": neighbor_cache.stats(), "paths": path_cache.stats()}
+
+
+def path_ids(path):
+    """
+    Translates a path of search states back to (movie_id, person_id) pairs.
+    """
+    if graph is None or path is None:
+        return path
+    return [(graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in path]
 
 
 def person_id_for_name(name):
@@ -139,13 +751,16 @@ def person_id_for_name(name):
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    # Both backends match names as the name index normalizes them,
+    # ignoring case and runs of whitespace
+    index = graph.names if graph is not None else name_index
+    person_ids = index.exact(name)
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            person = person_record(person_id)
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
@@ -160,11 +775,27 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def find_people(query, limit=10, max_distance=2):
+    """
+    Returns up to `limit` ranked candidates for a name query without
+    prompting: exact matches, then names starting with the query, then
+    names within `max_distance` edits. Each candidate is a dictionary
+    with the person's id, name, kind of match and edit distance.
+    """
+    index = graph.names if graph is not None else name_index
+    return index.lookup(query, limit, max_distance)
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return {
+            (graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in graph.neighbors(graph.person_index(person_id))
+        }
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -173,5 +804,25 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def person_record(person_id):
+    """
+    Returns a dictionary with at least the name and birth of a person,
+    from whichever backend is loaded.
+    """
+    if graph is not None:
+        return graph.person(person_id)
+    return people[person_id]
+
+
+def movie_record(movie_id):
+    """
+    Returns a dictionary with at least the title and year of a movie,
+    from whichever backend is loaded.
+    """
+    if graph is not None:
+        return graph.movie(movie_id)
+    return movies[movie_id]
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,203 @@
+"""
+Compact, integer-indexed representation of the people/movies graph.
+
+People and movies are interned to dense integers in sorted-ID order,
+and the person -> movie and movie -> person adjacency is kept as CSR
+arrays: an offsets array plus one flat array of neighbor indices.
+"""
+
+import bisect
+from array import array
+
+from loader import read_dataset
+from nameindex import NameIndex
+from tables import StringTable, build_csr
+
+
+class CompactGraph():
+    """
+    People/movies graph stored as flat integer arrays.
+
+    Person i has ID `person_ids[i]` and starred in the movies
+    `person_movies[person_offsets[i]:person_offsets[i + 1]]`;
+    movies map back to people the same way.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 person_offsets, person_movies,
+                 movie_ids, movie_titles, movie_years,
+                 movie_offsets, movie_people, names=None):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+        # NameIndex over the people, built here unless one is given
+        if names is None:
+            names = NameIndex.build(person_ids, person_names)
+        self.names = names
+
+    @classmethod
+    def from_csv(cls, directory, years=None, person_ids=None):
+        """
+        Builds a compact graph from the people, movies and stars CSV files,
+        keeping only what passes the filters described in
+        `loader.read_dataset`.
+
+        Returns the graph and the LoadReport of the read.
+        """
+        builder = GraphBuilder()
+        report = read_dataset(directory, builder.add_people, builder.add_movies,
+                              builder.add_stars, years, person_ids)
+        return builder.graph(), report
+
+    @classmethod
+    def from_rows(cls, people, movies, stars):
+        """
+        Builds a compact graph from iterables of (id, name, birth) people,
+        (id, title, year) movies and (person_id, movie_id) stars,
+        skipping stars rows for unknown people or movies.
+        """
+        builder = GraphBuilder()
+        builder.add_people(people)
+        builder.add_movies(movies)
+        builder.add_stars(stars)
+        return builder.graph()
+
+    def person_index(self, person_id):
+        """
+        Returns the dense index of a person ID, raising KeyError if unknown.
+        """
+        i = bisect.bisect_left(self.person_ids, person_id)
+        if i == len(self.person_ids) or self.person_ids[i] != person_id:
+            raise KeyError(person_id)
+        return i
+
+    def movie_index(self, movie_id):
+        """
+        Returns the dense index of a movie ID, raising KeyError if unknown.
+        """
+        i = bisect.bisect_left(self.movie_ids, movie_id)
+        if i == len(self.movie_ids) or self.movie_ids[i] != movie_id:
+            raise KeyError(movie_id)
+        return i
+
+    def person(self, person_id):
+        """
+        Returns a dictionary with the name and birth of a person.
+        """
+        i = self.person_index(person_id)
+        return {"name": self.person_names[i], "birth": self.person_births[i]}
+
+    def movie(self, movie_id):
+        """
+        Returns a dictionary with the title and year of a movie.
+        """
+        i = self.movie_index(movie_id)
+        return {"title": self.movie_titles[i], "year": self.movie_years[i]}
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people
+        who starred with the person at the given index.
+        """
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        for movie in self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]
+        ]:
+            for other in movie_people[
+                movie_offsets[movie]:movie_offsets[movie + 1]
+            ]:
+                yield movie, other
+
+    def nbytes(self):
+        """
+        Returns the approximate number of bytes held by the graph's arrays.
+        """
+        total = 0
+        for value in vars(self).values():
+            if isinstance(value, (StringTable, NameIndex)):
+                total += value.nbytes()
+            else:
+                total += len(value) * value.itemsize
+        return total
+
+
+class GraphBuilder():
+    """
+    Builds a CompactGraph from streams of rows, as read_dataset's sinks.
+    People and movies must both be added before stars.
+
+    Only the (name, birth) and (title, year) of each ID are held until
+    their string tables are built; a repeated ID keeps the last row
+    read, as a dictionary load would.
+    """
+
+    def __init__(self):
+        self.people = None
+        self.movies = None
+        self.person_index = None
+        self.movie_index = None
+        self.edge_people = array("i")
+        self.edge_movies = array("i")
+
+    def add_people(self, rows):
+        self.people, self.person_index = intern_rows(rows)
+
+    def add_movies(self, rows):
+        self.movies, self.movie_index = intern_rows(rows)
+
+    def add_stars(self, rows):
+        person_index = self.person_index
+        movie_index = self.movie_index
+        edge_people = self.edge_people
+        edge_movies = self.edge_movies
+        for person_id, movie_id in rows:
+            p = person_index.get(person_id)
+            m = movie_index.get(movie_id)
+            if p is None or m is None:
+                continue
+            edge_people.append(p)
+            edge_movies.append(m)
+
+    def graph(self):
+        """
+        Returns the CompactGraph of everything added.
+        """
+        self.person_index = self.movie_index = None
+        person_ids, person_names, person_births = self.people
+        movie_ids, movie_titles, movie_years = self.movies
+        person_offsets, person_movies = build_csr(
+            len(person_ids), self.edge_people, self.edge_movies
+        )
+        movie_offsets, movie_people = build_csr(
+            len(movie_ids), self.edge_movies, self.edge_people
+        )
+        return CompactGraph(person_ids, person_names, person_births,
+                            person_offsets, person_movies,
+                            movie_ids, movie_titles, movie_years,
+                            movie_offsets, movie_people)
+
+
+def intern_rows(rows):
+    """
+    Packs (id, a, b) rows into StringTables of IDs, a and b in sorted
+    ID order, keeping the last row for a repeated ID, and returns them
+    with a dictionary from each ID to its index.
+    """
+    fields = {}
+    for row_id, a, b in rows:
+        fields[row_id] = (a, b)
+    ids = sorted(fields)
+    tables = (
+        StringTable.from_strings(ids),
+        StringTable.from_strings(fields[row_id][0] for row_id in ids),
+        StringTable.from_strings(fields[row_id][1] for row_id in ids),
+    )
+    return tables, {row_id: i for i, row_id in enumerate(ids)}
@@ -0,0 +1,158 @@
+"""
+Landmark distance index for degree-of-separation estimates.
+
+A handful of well-connected people are picked as landmarks and the
+distance from each of them to every person is stored. By the triangle
+inequality, for any landmark L:
+
+    |d(L, s) - d(L, t)|  <=  d(s, t)  <=  d(L, s) + d(L, t)
+
+so the distance between two people is bounded in O(K) for K landmarks,
+and the lower bound is an admissible A* heuristic.
+
+People are addressed by rank: their position in sorted person-ID order,
+which is also the CompactGraph index of that person.
+"""
+
+import math
+from array import array
+from collections import deque
+
+from tables import load_index, write_index
+
+MAGIC = b"DEGLMRK\0"
+VERSION = 2
+INDEX_NAME = "landmarks.idx"
+DEFAULT_COUNT = 16
+
+# Stored distance for people a landmark cannot reach
+UNREACHABLE = 255
+
+
+class LandmarkIndex():
+    """
+    BFS distances from K landmark people to everyone else.
+
+    `distances[k][rank]` is the number of degrees between landmark k
+    and the person of that rank, or UNREACHABLE. `ranks` translates
+    search states to ranks; None means states already are ranks.
+    """
+
+    def __init__(self, landmarks, distances, ranks=None):
+        self.landmarks = landmarks
+        self.distances = distances
+        self.ranks = ranks
+
+    @classmethod
+    def build(cls, size, neighbors, degree, count=DEFAULT_COUNT):
+        """
+        Picks up to `count` landmarks among `size` people, preferring the
+        highest `degree(rank)` and skipping anyone next to a landmark
+        already chosen, then runs a breadth-first search from each.
+
+        `neighbors(rank)` yields (movie, rank) pairs.
+        """
+        landmarks = []
+        distances = []
+        for candidate in sorted(range(size), key=degree, reverse=True):
+            if len(landmarks) == count or degree(candidate) == 0:
+                break
+            if any(row[candidate] <= 1 for row in distances):
+                continue
+            landmarks.append(candidate)
+            distances.append(distances_from(candidate, size, neighbors))
+        return cls(landmarks, distances)
+
+    def rank(self, state):
+        return state if self.ranks is None else self.ranks[state]
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees between two states.
+
+        Both are math.inf when some landmark reaches exactly one of them,
+        since they must then be in different components; the upper bound
+        alone is math.inf when no landmark reaches either.
+        """
+        if source == target:
+            return 0, 0
+        s = self.rank(source)
+        t = self.rank(target)
+        lower = 1
+        upper = math.inf
+        for row in self.distances:
+            ds = row[s]
+            dt = row[t]
+            if ds == UNREACHABLE and dt == UNREACHABLE:
+                continue
+            if ds == UNREACHABLE or dt == UNREACHABLE:
+                return math.inf, math.inf
+            lower = max(lower, abs(ds - dt))
+            upper = min(upper, ds + dt)
+        return lower, upper
+
+    def heuristic(self, target):
+        """
+        Returns a function giving a lower bound on the degrees
+        from any state to the target.
+        """
+        t = self.rank(target)
+        # Only landmarks that reach the target can say anything about it
+        rows = [(row, row[t]) for row in self.distances
+                if row[t] != UNREACHABLE]
+
+        def estimate(state):
+            s = self.rank(state)
+            best = 0
+            for row, dt in rows:
+                ds = row[s]
+                if ds == UNREACHABLE:
+                    return math.inf
+                if abs(ds - dt) > best:
+                    best = abs(ds - dt)
+            return best
+
+        return estimate
+
+    def save(self, path, fingerprint):
+        """
+        Writes the index to `path`, tagged with the data fingerprint
+        it was built from.
+        """
+        metadata = {"sources": fingerprint, "landmarks": self.landmarks}
+        write_index(path, MAGIC, VERSION, metadata, [
+            (f"distances.{k}", row, "B") for k, row in enumerate(self.distances)
+        ])
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """
+        Memory-maps an index from `path`, or returns None if it is
+        missing, unreadable or was built from different data.
+        """
+        loaded = load_index(path, MAGIC, VERSION, fingerprint)
+        if loaded is None:
+            return None
+        metadata, sections = loaded
+        distances = [
+            sections[f"distances.{k}"] for k in range(len(metadata["landmarks"]))
+        ]
+        return cls(metadata["landmarks"], distances)
+
+
+def distances_from(origin, size, neighbors):
+    """
+    Returns the breadth-first distance from `origin` to every rank,
+    capped just below UNREACHABLE.
+    """
+    row = array("B", [UNREACHABLE]) * size
+    row[origin] = 0
+    frontier = deque([origin])
+    while frontier:
+        rank = frontier.popleft()
+        distance = min(row[rank] + 1, UNREACHABLE - 1)
+        for _, other in neighbors(rank):
+            if row[other] == UNREACHABLE:
+                row[other] = distance
+                frontier.append(other)
+    return row
@@ -0,0 +1,175 @@
+"""
+Streaming, filtering reader for the degrees CSV files.
+
+Rows are read one at a time and handed straight to the caller's sinks,
+with a year range or person subset applied on the way, so the reader
+itself never holds any rows: peak memory is that of what is kept.
+"""
+
+import csv
+import hashlib
+from operator import itemgetter
+
+
+class LoadReport():
+    """
+    Counts of rows read, kept and dropped from each CSV file.
+
+    `dropped` counts rows excluded by a filter, `orphaned` counts stars
+    rows naming a person or movie that is not in the data, and
+    `malformed` counts rows with missing fields.
+    """
+
+    FILES = ("people", "movies", "stars")
+
+    def __init__(self):
+        self.read = dict.fromkeys(self.FILES, 0)
+        self.kept = dict.fromkeys(self.FILES, 0)
+        self.dropped = dict.fromkeys(self.FILES, 0)
+        self.malformed = dict.fromkeys(self.FILES, 0)
+        self.orphaned = 0
+
+    def __str__(self):
+        parts = []
+        for name in self.FILES:
+            part = (f"{name}: {self.read[name]} read, {self.kept[name]} kept, "
+                    f"{self.dropped[name]} dropped")
+            if self.malformed[name]:
+                part += f", {self.malformed[name]} malformed"
+            if name == "stars":
+                part += f", {self.orphaned} orphaned"
+            parts.append(part)
+        return "; ".join(parts)
+
+
+def read_dataset(directory, load_people, load_movies, load_stars,
+                 years=None, person_ids=None):
+    """
+    Streams the people, movies and stars CSV files in `directory` into
+    the three sinks. Each is called once with an iterator over the kept
+    rows of its file: (id, name, birth) people, (id, title, year)
+    movies and (person_id, movie_id) stars. Stars come last and only
+    name kept people and movies, so a sink can build its structures
+    straight from the rows without the reader holding any of them.
+
+    `years` is an inclusive (first, last) range of movie years and
+    `person_ids` a collection of people to keep; either may be None.
+    With a year range, people are only kept if they starred in a kept
+    movie, which takes a first pass over the stars file to find them,
+    and stars rows for unknown movies cannot be told apart from rows
+    for movies outside the range, so both count as dropped.
+
+    Returns a LoadReport.
+    """
+    report = LoadReport()
+    if person_ids is not None:
+        person_ids = set(person_ids)
+
+    # Only the kept IDs are remembered, to check stars rows against
+    movie_ids = set()
+    known = set()
+
+    def movie_rows():
+        for row in read_rows(directory, "movies", ("id", "title", "year"), report):
+            if years is not None and not in_range(row[2], years):
+                report.dropped["movies"] += 1
+                continue
+            movie_ids.add(row[0])
+            report.kept["movies"] += 1
+            yield row
+
+    def people_rows():
+        for row in read_rows(directory, "people", ("id", "name", "birth"), report):
+            if person_ids is not None and row[0] not in person_ids:
+                report.dropped["people"] += 1
+                continue
+            known.add(row[0])
+            report.kept["people"] += 1
+            yield row
+
+    def star_rows(counts):
+        for row in read_rows(directory, "stars", ("person_id", "movie_id"), counts):
+            if person_ids is not None and row[0] not in person_ids:
+                report.dropped["stars"] += 1
+            elif row[1] not in movie_ids:
+                if years is not None:
+                    report.dropped["stars"] += 1
+                else:
+                    report.orphaned += 1
+            elif row[0] not in known:
+                report.orphaned += 1
+            else:
+                report.kept["stars"] += 1
+                yield row
+
+    if years is None:
+        load_people(people_rows())
+        load_movies(movie_rows())
+    else:
+        load_movies(movie_rows())
+        # Stars rows that pass any person filter narrow it to this range
+        person_ids = {
+            person_id
+            for person_id, movie_id in read_rows(
+                directory, "stars", ("person_id", "movie_id"), report
+            )
+            if movie_id in movie_ids
+            and (person_ids is None or person_id in person_ids)
+        }
+        load_people(people_rows())
+    # The first pass already counted the stars file's rows
+    load_stars(star_rows(report if years is None else LoadReport()))
+    return report
+
+
+def read_rows(directory, name, fields, report):
+    """
+    Yields each row of `directory/name.csv` as a tuple of `fields`,
+    counting rows with a missing field as malformed and skipping them.
+    """
+    with open(f"{directory}/{name}.csv", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if any(field not in header for field in fields):
+            # Without a column, every row is missing that field
+            for row in reader:
+                if row:
+                    report.read[name] += 1
+                    report.malformed[name] += 1
+            return
+        columns = [header.index(field) for field in fields]
+        needed = max(columns) + 1
+        pick = itemgetter(*columns)
+        for row in reader:
+            if not row:
+                continue
+            report.read[name] += 1
+            if len(row) < needed:
+                report.malformed[name] += 1
+                continue
+            yield pick(row)
+
+
+def in_range(year, years):
+    try:
+        year = int(year)
+    except ValueError:
+        return False
+    return years[0] <= year <= years[1]
+
+
+def filters_key(years=None, person_ids=None):
+    """
+    Returns a JSON-friendly description of a set of filters, or None
+    for an unfiltered load, so indexes built from filtered data can be
+    told apart from ones built from the whole dataset.
+    """
+    if years is None and person_ids is None:
+        return None
+    key = {"years": None if years is None else list(years), "people": None}
+    if person_ids is not None:
+        digest = hashlib.sha1()
+        for person_id in sorted(set(person_ids)):
+            digest.update(person_id.encode("utf-8") + b"\n")
+        key["people"] = digest.hexdigest()
+    return key
@@ -0,0 +1,246 @@
+"""
+Exact, prefix and fuzzy name search over people.
+
+Names are normalized (lowercase, single spaces) into a sorted table of
+distinct keys, so exact and prefix lookups are binary searches. Fuzzy
+lookups use a trigram index from keys to the keys containing them.
+One edit touches at most three trigrams, so a name within edit distance
+k of the query must contain at least m - 3k of any m distinct query
+trigrams. The postings of the rarest trigrams are counted, names that
+fall short of that are discarded, and the rest are checked with a
+banded edit distance.
+"""
+
+import bisect
+from array import array
+from collections import Counter
+
+from tables import StringTable, build_csr
+
+# Sections a NameIndex is stored as, in snapshot order
+SECTIONS = ("keys", "key_offsets", "key_people", "grams",
+            "gram_offsets", "gram_keys")
+
+# Ranking of the kinds of match, best first
+EXACT, PREFIX, FUZZY = "exact", "prefix", "fuzzy"
+KIND_ORDER = {EXACT: 0, PREFIX: 1, FUZZY: 2}
+
+# Most postings a fuzzy lookup counts beyond the ones it must scan
+POSTINGS_BUDGET = 2000
+
+
+class NameIndex():
+    """
+    Searchable index of people's names.
+
+    `keys` are the sorted distinct normalized names, and the people of
+    key i are `key_people[key_offsets[i]:key_offsets[i + 1]]` as ranks
+    into `person_ids` and `person_names`. `grams` are the sorted distinct
+    trigrams, with the keys containing gram j listed the same way in
+    `gram_keys`.
+    """
+
+    def __init__(self, keys, key_offsets, key_people,
+                 grams, gram_offsets, gram_keys,
+                 person_ids, person_names):
+        self.keys = keys
+        self.key_offsets = key_offsets
+        self.key_people = key_people
+        self.grams = grams
+        self.gram_offsets = gram_offsets
+        self.gram_keys = gram_keys
+        self.person_ids = person_ids
+        self.person_names = person_names
+        # Maps each trigram to its position in `grams`, built on first use
+        self.gram_positions = None
+
+    @classmethod
+    def build(cls, person_ids, person_names):
+        """
+        Indexes the names of people given as parallel sequences.
+        """
+        ranks_by_key = {}
+        for rank, name in enumerate(person_names):
+            ranks_by_key.setdefault(normalize(name), []).append(rank)
+        keys = sorted(ranks_by_key)
+
+        key_sources = array("i")
+        key_targets = array("i")
+        gram_postings = {}
+        for i, key in enumerate(keys):
+            for rank in ranks_by_key[key]:
+                key_sources.append(i)
+                key_targets.append(rank)
+            for gram in set(trigrams(key)):
+                gram_postings.setdefault(gram, []).append(i)
+        del ranks_by_key
+
+        grams = sorted(gram_postings)
+        gram_sources = array("i")
+        gram_targets = array("i")
+        for j, gram in enumerate(grams):
+            for i in gram_postings[gram]:
+                gram_sources.append(j)
+                gram_targets.append(i)
+        del gram_postings
+
+        key_offsets, key_people = build_csr(len(keys), key_sources, key_targets)
+        gram_offsets, gram_keys = build_csr(len(grams), gram_sources, gram_targets)
+        return cls(StringTable.from_strings(keys), key_offsets, key_people,
+                   StringTable.from_strings(grams), gram_offsets, gram_keys,
+                   person_ids, person_names)
+
+    def sections(self):
+        """
+        Returns the index's stored parts, by name, as in SECTIONS.
+        """
+        return {name: getattr(self, name) for name in SECTIONS}
+
+    def exact(self, name):
+        """
+        Returns the IDs of everyone whose normalized name matches exactly.
+        """
+        i = self.find_key(normalize(name))
+        if i is None:
+            return []
+        return [self.person_ids[rank] for rank in self.people_of(i)]
+
+    def lookup(self, query, limit=10, max_distance=2):
+        """
+        Returns up to `limit` ranked candidates for a query, without
+        prompting: exact matches first, then names the query is a prefix
+        of, or if there are neither, names within `max_distance` edits,
+        closest first.
+
+        Each candidate is a dictionary with the person's id, name, kind
+        of match and edit distance from the query.
+        """
+        query = normalize(query)
+        if not query or limit <= 0:
+            return []
+
+        # Maps key index to (kind, distance), keeping the best match
+        matches = {}
+        i = self.find_key(query)
+        if i is not None:
+            matches[i] = (EXACT, 0)
+
+        start = bisect.bisect_left(self.keys, query)
+        for i in range(start, min(start + limit + 1, len(self.keys))):
+            key = self.keys[i]
+            if not key.startswith(query):
+                break
+            matches.setdefault(i, (PREFIX, len(key) - len(query)))
+
+        if not matches and max_distance > 0:
+            for i in self.fuzzy_keys(query, max_distance):
+                distance = bounded_distance(query, self.keys[i], max_distance)
+                if distance is not None:
+                    matches[i] = (FUZZY, distance)
+
+        ranked = sorted(
+            matches.items(),
+            key=lambda item: (KIND_ORDER[item[1][0]], item[1][1], item[0])
+        )
+        candidates = []
+        for i, (kind, distance) in ranked:
+            for rank in self.people_of(i):
+                candidates.append({
+                    "id": self.person_ids[rank],
+                    "name": self.person_names[rank],
+                    "match": kind,
+                    "distance": distance if kind != PREFIX else 0,
+                })
+                if len(candidates) == limit:
+                    return candidates
+        return candidates
+
+    def find_key(self, key):
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return i
+        return None
+
+    def people_of(self, i):
+        return self.key_people[self.key_offsets[i]:self.key_offsets[i + 1]]
+
+    def fuzzy_keys(self, query, max_distance):
+        """
+        Returns the keys that may be within `max_distance` edits of the
+        query, counted from the postings of its rarest trigrams.
+        """
+        if self.gram_positions is None:
+            self.gram_positions = {
+                gram: j for j, gram in enumerate(self.grams)
+            }
+
+        postings = []
+        for gram in set(trigrams(query)):
+            j = self.gram_positions.get(gram)
+            if j is not None:
+                start, end = self.gram_offsets[j], self.gram_offsets[j + 1]
+            else:
+                start = end = 0
+            postings.append((end - start, start, end))
+        postings.sort()
+
+        # Every match is in one of the rarest 3k + 1 postings; counting
+        # more of them, within budget, lets more candidates be ruled out
+        required = 3 * max_distance + 1
+        used = min(required, len(postings))
+        counted = sum(size for size, _, _ in postings[:used])
+        allowed = counted + POSTINGS_BUDGET
+        while used < len(postings) and counted + postings[used][0] <= allowed:
+            counted += postings[used][0]
+            used += 1
+
+        counts = Counter()
+        for _, start, end in postings[:used]:
+            counts.update(self.gram_keys[start:end])
+        least = used - 3 * max_distance
+        return [i for i, count in counts.items() if count >= least]
+
+    def nbytes(self):
+        total = 0
+        for value in self.sections().values():
+            if isinstance(value, StringTable):
+                total += value.nbytes()
+            else:
+                total += len(value) * value.itemsize
+        return total
+
+
+def normalize(name):
+    return " ".join(name.lower().split())
+
+
+def trigrams(key):
+    padded = f"  {key}  "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def bounded_distance(a, b, bound):
+    """
+    Returns the Levenshtein distance between two strings,
+    or None if it is greater than `bound`.
+    """
+    if abs(len(a) - len(b)) > bound:
+        return None
+
+    # Only cells within `bound` of the diagonal can stay within bound
+    outside = bound + 1
+    previous = [j if j <= bound else outside for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [i if i <= bound else outside] + [outside] * len(b)
+        ca = a[i - 1]
+        for j in range(max(1, i - bound), min(len(b), i + bound) + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != b[j - 1]),
+                outside,
+            )
+        if min(current) > bound:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= bound else None
@@ -0,0 +1,252 @@
+"""
+Long-running degrees query server.
+
+Loads a dataset once and answers queries over a Unix socket, or TCP on
+localhost, as newline-delimited JSON. Each request is an object with an
+"op" and an optional "id" that is echoed back in its response:
+
+    {"id": 1, "op": "path", "source": "102", "target": "158"}
+    {"id": 2, "op": "names", "query": "tom hank", "limit": 5}
+    {"id": 3, "op": "ping"}
+
+A path request may also give a "strategy", a "max_expanded" budget,
+which is capped at the server's own, and "stats": true to get the
+search's statistics back with its answer. Responses to requests on one
+connection are written as they finish, not necessarily in order.
+
+Path searches run on a pool of worker processes, each memory-mapping
+the dataset's snapshot, so the event loop only parses requests and
+answers name lookups. A request that is not answered within the timeout
+gets an error response; its worker is still stopped by the expansion
+budget, since a process pool cannot interrupt a running task.
+
+Try it with: printf '{"op": "ping"}\\n' | nc -U degrees.sock
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import degrees
+from snapshot import compile_snapshot, load_snapshot
+from util import SearchStats
+
+STRATEGIES = ("bidirectional", "bfs", "landmarks")
+
+# Longest request line accepted, in bytes
+MAX_REQUEST = 64 * 1024
+
+
+def init_worker(directory, landmarks):
+    degrees.load_data(directory)
+    degrees.load_components(directory)
+    if landmarks:
+        degrees.load_landmarks(directory)
+
+
+def find_path(source, target, strategy, max_expanded, with_stats=False):
+    """
+    Returns the result of one path request, run inside a worker.
+    """
+    stats = SearchStats() if with_stats else None
+    path = degrees.shortest_path(source, target, strategy, max_expanded, stats)
+    result = {
+        "source": source,
+        "target": target,
+        "degrees": None if path is None else len(path),
+        "path": path,
+    }
+    if stats is not None:
+        result["stats"] = stats.as_dict()
+    return result
+
+
+class Server():
+    """
+    Answers requests against the loaded dataset, sending path searches
+    to `executor` with at most `max_expanded` people expanded each and
+    giving up on any request after `timeout` seconds.
+    """
+
+    def __init__(self, executor, timeout, max_expanded, strategies):
+        self.executor = executor
+        self.timeout = timeout
+        self.max_expanded = max_expanded
+        self.strategies = strategies
+
+    async def handle_connection(self, reader, writer):
+        tasks = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(encode({"error": "request too long"}))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self.respond(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def respond(self, line, writer):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            writer.write(encode({"error": f"invalid request: {e}"}))
+            await writer.drain()
+            return
+
+        try:
+            response = await asyncio.wait_for(
+                self.answer(request), self.timeout
+            )
+        except asyncio.TimeoutError:
+            response = {"error": f"timed out after {self.timeout} seconds"}
+        except degrees.SearchLimitExceeded as e:
+            response = {"error": str(e)}
+        except KeyError as e:
+            response = {"error": f"unknown person: {e.args[0]}"}
+        except (TypeError, ValueError) as e:
+            response = {"error": str(e)}
+        if "id" in request:
+            response = {"id": request["id"], **response}
+        writer.write(encode(response))
+        await writer.drain()
+
+    async def answer(self, request):
+        op = request.get("op")
+        if op == "path":
+            return await self.path(request)
+        if op == "names":
+            return {"matches": degrees.find_people(
+                required(request, "query"),
+                limit=int(request.get("limit", 10)),
+                max_distance=int(request.get("max_distance", 2)),
+            )}
+        if op == "ping":
+            return {"ok": True}
+        raise ValueError(f"unknown op: {op}")
+
+    async def path(self, request):
+        strategy = request.get("strategy", "bidirectional")
+        if strategy not in self.strategies:
+            raise ValueError(f"unavailable search strategy: {strategy}")
+        budget = self.max_expanded
+        if request.get("max_expanded") is not None:
+            budget = min(budget, int(request["max_expanded"]))
+        source = required(request, "source")
+        target = required(request, "target")
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, find_path, source, target, strategy, budget,
+            bool(request.get("stats"))
+        )
+
+
+def required(request, field):
+    if request.get(field) is None:
+        raise ValueError(f"missing field: {field}")
+    return str(request[field])
+
+
+def encode(response):
+    return (json.dumps(response) + "\n").encode("utf-8")
+
+
+async def serve(server, socket_path=None, port=None):
+    if socket_path is not None:
+        listener = await asyncio.start_unix_server(
+            server.handle_connection, socket_path, limit=MAX_REQUEST
+        )
+        print(f"Listening on {socket_path}")
+    else:
+        listener = await asyncio.start_server(
+            server.handle_connection, "127.0.0.1", port, limit=MAX_REQUEST
+        )
+        print(f"Listening on 127.0.0.1:{port}")
+
+    # Serve until interrupted or terminated
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    async with listener:
+        await stop.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python server.py [directory] [--socket PATH | --port N] "
+              "[--workers N] [--timeout SECONDS] [--max-expanded N]"
+    )
+    parser.add_argument("directory", nargs="?", default="small")
+    address = parser.add_mutually_exclusive_group()
+    address.add_argument("--socket", default="degrees.sock",
+                         help="Unix socket to listen on (default degrees.sock)")
+    address.add_argument("--port", type=int,
+                         help="listen on this localhost TCP port instead")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="search processes, or 0 for one in-process "
+                             "thread (default: one per CPU)")
+    parser.add_argument("--timeout", type=float, default=10.0,
+                        help="seconds before a request is abandoned")
+    parser.add_argument("--max-expanded", type=int, default=1_000_000,
+                        help="most people a single search may expand")
+    parser.add_argument("--landmarks", action="store_true",
+                        help="load the landmark index for that strategy")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    if load_snapshot(args.directory) is None:
+        compile_snapshot(args.directory)
+    degrees.load_data(args.directory)
+    # Build any missing indexes once here, before the workers load them
+    degrees.load_components(args.directory)
+    strategies = STRATEGIES if args.landmarks else STRATEGIES[:2]
+    if args.landmarks:
+        degrees.load_landmarks(args.directory)
+    print("Data loaded.")
+
+    if args.workers > 0:
+        # Spawn rather than fork workers, which would otherwise inherit
+        # and hold open whichever client connections were open then
+        executor = ProcessPoolExecutor(
+            max_workers=args.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(args.directory, args.landmarks)
+        )
+    else:
+        # The module-level caches are not thread-safe, so keep to one thread
+        executor = ThreadPoolExecutor(max_workers=1)
+
+    server = Server(executor, args.timeout, args.max_expanded, strategies)
+    socket_path = None if args.port is not None else args.socket
+    try:
+        asyncio.run(serve(server, socket_path, args.port))
+    finally:
+        executor.shutdown(cancel_futures=True)
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Binary snapshots of a CompactGraph, loaded by memory-mapping.
+
+A snapshot is a file in the layout described in tables.py, with magic
+b"DEGSNAP\\0", whose sections are the graph's flat arrays and string
+tables, including its name index. Arrays are stored little-endian and
+mapped straight back as memoryviews, so loading does no parsing beyond
+the header.
+"""
+
+import os
+import sys
+
+from graph import CompactGraph
+from nameindex import SECTIONS as NAME_SECTIONS, NameIndex
+from tables import StringTable, load_index, read_index, write_index
+
+MAGIC = b"DEGSNAP\0"
+VERSION = 2
+SNAPSHOT_NAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+ARRAYS = (
+    "person_offsets", "person_movies",
+    "movie_offsets", "movie_people",
+)
+TABLES = (
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years",
+)
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, SNAPSHOT_NAME)
+
+
+def source_fingerprint(directory):
+    """
+    Returns the size and modification time of each source CSV,
+    which a snapshot must match to still be considered fresh.
+    """
+    fingerprint = {}
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        fingerprint[name] = [stat.st_size, stat.st_mtime_ns]
+    return fingerprint
+
+
+def graph_sections(graph):
+    """
+    Yields (name, buffer, typecode) for every array the graph is made of.
+    """
+    for name in ARRAYS:
+        values = getattr(graph, name)
+        yield name, values, values.typecode
+    for name in TABLES:
+        yield from table_sections(name, getattr(graph, name))
+    for name, values in graph.names.sections().items():
+        if isinstance(values, StringTable):
+            yield from table_sections(f"names.{name}", values)
+        else:
+            yield f"names.{name}", values, values.typecode
+
+
+def table_sections(name, table):
+    yield f"{name}.offsets", table.offsets, table.offsets.typecode
+    yield f"{name}.blob", table.blob, "B"
+
+
+def write_snapshot(graph, path, fingerprint):
+    """
+    Writes a graph to `path` as a snapshot of the given source fingerprint.
+    """
+    if sys.byteorder != "little":
+        raise RuntimeError("snapshots can only be written on little-endian hosts")
+
+    write_index(path, MAGIC, VERSION, {"sources": fingerprint},
+                list(graph_sections(graph)))
+
+
+def read_snapshot(path):
+    """
+    Memory-maps a snapshot and returns (graph, source fingerprint).
+
+    Raises ValueError if the file is not a snapshot of this version.
+    """
+    metadata, sections = read_index(path, MAGIC, VERSION)
+    return graph_from_sections(sections), metadata["sources"]
+
+
+def graph_from_sections(sections):
+    """
+    Returns the CompactGraph made of a snapshot's sections.
+    """
+    def table(name):
+        return StringTable(sections[f"{name}.blob"], sections[f"{name}.offsets"])
+
+    fields = {name: sections[name] for name in ARRAYS}
+    for name in TABLES:
+        fields[name] = table(name)
+
+    name_fields = {}
+    for name in NAME_SECTIONS:
+        if f"names.{name}" in sections:
+            name_fields[name] = sections[f"names.{name}"]
+        else:
+            name_fields[name] = table(f"names.{name}")
+    fields["names"] = NameIndex(
+        person_ids=fields["person_ids"], person_names=fields["person_names"],
+        **name_fields
+    )
+    return CompactGraph(**fields)
+
+
+def load_snapshot(directory):
+    """
+    Returns the graph from a directory's snapshot, or None if there is
+    no snapshot or it no longer matches the CSV files beside it.
+    """
+    if sys.byteorder != "little":
+        return None
+    try:
+        fingerprint = source_fingerprint(directory)
+    except OSError:
+        return None
+    loaded = load_index(snapshot_path(directory), MAGIC, VERSION, fingerprint)
+    if loaded is None:
+        return None
+    try:
+        return graph_from_sections(loaded[1])
+    except KeyError:
+        return None
+
+
+def compile_snapshot(directory):
+    """
+    Parses a directory's CSV files once and writes its snapshot.
+    """
+    fingerprint = source_fingerprint(directory)
+    graph, _ = CompactGraph.from_csv(directory)
+    write_snapshot(graph, snapshot_path(directory), fingerprint)
+    return graph
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python snapshot.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "small"
+
+    print("Compiling snapshot...")
+    graph = compile_snapshot(directory)
+    print(f"Wrote {snapshot_path(directory)} "
+          f"({len(graph.person_ids)} people, {len(graph.movie_ids)} movies).")
+
+
+if __name__ == "__main__":
+    main()
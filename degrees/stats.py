@@ -0,0 +1,91 @@
+"""
+Whole-graph statistics for a degrees dataset.
+
+Component sizes and the degree distributions of people and movies come
+from the single pass of components.label_components. Eccentricity needs
+distances, which no streaming pass over the edges can give, so it is
+bounded from the landmark index instead: for a landmark L in the same
+component as v, d(L, v) <= ecc(v) <= d(L, v) + ecc(L).
+
+The component labels are saved beside the data for load_components in
+degrees.py to pick up.
+
+Usage: python stats.py [directory]
+"""
+
+import json
+import os
+import sys
+from collections import Counter
+
+import degrees
+from components import INDEX_NAME, label_components
+from landmarks import UNREACHABLE
+from snapshot import source_fingerprint
+
+
+def eccentricity_histograms(landmarks, size):
+    """
+    Returns histograms of lower and upper bounds on each person's
+    eccentricity within their component, from the landmark distances.
+    People whose component has no landmark are left out.
+    """
+    # A landmark's eccentricity is the largest distance it reaches
+    reach = []
+    for row in landmarks.distances:
+        farthest = max((d for d in row if d != UNREACHABLE), default=0)
+        reach.append((row, farthest))
+
+    lower = Counter()
+    upper = Counter()
+    for rank in range(size):
+        low = None
+        high = None
+        for row, farthest in reach:
+            d = row[rank]
+            if d == UNREACHABLE:
+                continue
+            low = d if low is None else max(low, d)
+            high = d + farthest if high is None else min(high, d + farthest)
+        if low is not None:
+            lower[low] += 1
+            upper[high] += 1
+    return lower, upper
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python stats.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "small"
+
+    # One streaming pass gives components and both degree distributions;
+    # keep the components so queries can use them
+    components, movie_counts, cast_sizes = label_components(directory)
+    components.save(
+        os.path.join(directory, INDEX_NAME), source_fingerprint(directory)
+    )
+
+    degrees.load_data(directory)
+    degrees.load_landmarks(directory)
+    lower, upper = eccentricity_histograms(
+        degrees.landmarks, len(components.labels)
+    )
+
+    print(json.dumps({
+        "people": len(components.labels),
+        "components": len(components.sizes),
+        "largest_components": list(components.sizes[:10]),
+        "component_sizes": histogram(Counter(components.sizes)),
+        "movies_per_person": histogram(movie_counts),
+        "people_per_movie": histogram(cast_sizes),
+        "eccentricity_lower_bound": histogram(lower),
+        "eccentricity_upper_bound": histogram(upper),
+    }, indent=2))
+
+
+def histogram(counter):
+    return {str(value): counter[value] for value in sorted(counter)}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Flat-array building blocks shared by the graph, its name index and the
+files it is saved in.
+
+Snapshots and the component and landmark indexes share one file layout:
+
+    magic      8 bytes, naming the kind of file
+    version    uint32, little-endian
+    length     uint32, length of the JSON metadata that follows
+    metadata   JSON: the file's own fields, the source CSV fingerprint
+               and a table of {name: [offset, length, typecode]} sections
+
+followed by the sections' arrays, each aligned to 8 bytes and mapped
+straight back as memoryviews when the file is read.
+"""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+
+HEADER = struct.Struct("<8sII")
+
+
+class StringTable():
+    """
+    Read-only sequence of strings packed into a single UTF-8 blob,
+    with an offsets array marking where each string starts and ends.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        offsets = array("q", [0])
+        chunks = []
+        size = 0
+        for s in strings:
+            data = s.encode("utf-8")
+            chunks.append(data)
+            size += len(data)
+            offsets.append(size)
+        return cls(b"".join(chunks), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def nbytes(self):
+        return len(self.blob) + len(self.offsets) * self.offsets.itemsize
+
+
+def build_csr(size, sources, targets):
+    """
+    Groups an edge list by source index into CSR offsets and indices,
+    with each source's targets sorted and free of duplicates.
+    """
+    counts = array("q", bytes(8 * (size + 1)))
+    for s in sources:
+        counts[s + 1] += 1
+    for i in range(size):
+        counts[i + 1] += counts[i]
+
+    indices = array("i", bytes(4 * len(sources)))
+    cursor = array("q", counts)
+    for s, t in zip(sources, targets):
+        indices[cursor[s]] = t
+        cursor[s] += 1
+
+    # Sort each row and squeeze out repeated edges in place
+    offsets = array("q", [0])
+    write = 0
+    for i in range(size):
+        row = sorted(set(indices[counts[i]:counts[i + 1]]))
+        indices[write:write + len(row)] = array("i", row)
+        write += len(row)
+        offsets.append(write)
+    del indices[write:]
+    return offsets, indices
+
+
+def write_index(path, magic, version, metadata, sections):
+    """
+    Writes `metadata` and a list of (name, buffer, typecode) sections
+    to `path`, replacing any file there only once it is complete.
+    """
+    # Lay out sections after the header, which itself depends on the layout,
+    # so grow the assumed header size until the metadata fits
+    reserved = 4096
+    while True:
+        table = {}
+        offset = align(reserved)
+        for name, values, typecode in sections:
+            size = memoryview(values).nbytes
+            table[name] = [offset, size, typecode]
+            offset = align(offset + size)
+        encoded = json.dumps({**metadata, "sections": table}).encode("utf-8")
+        if HEADER.size + len(encoded) <= reserved:
+            break
+        reserved *= 2
+
+    temp = f"{path}.tmp"
+    with open(temp, "wb") as f:
+        f.write(HEADER.pack(magic, version, len(encoded)))
+        f.write(encoded)
+        for name, values, typecode in sections:
+            f.seek(table[name][0])
+            f.write(memoryview(values).cast("B"))
+    os.replace(temp, path)
+
+
+def read_index(path, magic, version):
+    """
+    Memory-maps a file written by `write_index` and returns its metadata
+    and a dictionary of its sections as memoryviews.
+
+    Raises ValueError if the file is not of this kind and version, or
+    is too short to hold every section its metadata lists.
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(mapped)
+    if len(view) < HEADER.size:
+        raise ValueError("truncated file")
+    found, found_version, length = HEADER.unpack_from(view)
+    if found != magic or found_version != version:
+        raise ValueError(f"not a {magic!r} file of version {version}")
+    metadata = json.loads(bytes(view[HEADER.size:HEADER.size + length]))
+    sections = {}
+    for name, (offset, size, typecode) in metadata.pop("sections").items():
+        if offset < 0 or size < 0 or offset + size > len(view):
+            raise ValueError(f"truncated file: section {name} is incomplete")
+        sections[name] = view[offset:offset + size].cast(typecode)
+    return metadata, sections
+
+
+def load_index(path, magic, version, fingerprint):
+    """
+    Returns what `read_index` does, or None if the file is missing,
+    unreadable or was built from CSV files other than `fingerprint`.
+    """
+    try:
+        metadata, sections = read_index(path, magic, version)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if metadata.get("sources") != fingerprint:
+        return None
+    return metadata, sections
+
+
+def align(offset):
+    return (offset + 7) & ~7
@@ -1,4 +1,10 @@
+from array import array
+from collections import deque
+
+
 class Node():
+    __slots__ = ("state", "parent", "action")
+
     def __init__(self, state, parent, action):
         self.state = state
         self.parent = parent
@@ -6,33 +12,178 @@ class Node():
 
 
 class StackFrontier():
+    """
+    Last-in first-out frontier.
+
+    Nodes are kept in a deque so both ends pop in constant time,
+    and their states in a set so `contains_state` is a hash lookup.
+    Callers should not add a state that is already in the frontier.
+    """
+
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        self.states = set()
 
     def add(self, node):
         self.frontier.append(node)
+        self.states.add(node.state)
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
 
+    def __len__(self):
+        return len(self.frontier)
+
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.states.discard(node.state)
             return node
 
 
 class QueueFrontier(StackFrontier):
+    """
+    First-in first-out frontier.
+    """
 
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.states.discard(node.state)
             return node
+
+
+class ParentTable():
+    """
+    How each state reached by a search was reached, kept as flat
+    parent and movie tables rather than one node object per state.
+
+    `stamp_of(state) == generation` says whether a state has been
+    reached in the current search, without recording the state as a
+    lookup in `stamp` would; a state's parent and movie are only
+    meaningful if so. Call `reset` before each search.
+    """
+
+    def __init__(self):
+        self.parent = {}
+        self.movie = {}
+        self.stamp = {}
+        self.stamp_of = self.stamp.get
+        self.generation = 0
+
+    def reset(self):
+        """
+        Forgets every state reached so far and returns the new generation.
+        """
+        self.parent.clear()
+        self.movie.clear()
+        self.stamp.clear()
+        self.generation = 1
+        return self.generation
+
+    def path(self, state, root):
+        """
+        Returns the (movie, state) pairs leading from `root` to `state`.
+        """
+        parent = self.parent
+        movie = self.movie
+        path = []
+        while state != root:
+            path.append((movie[state], state))
+            state = parent[state]
+        path.reverse()
+        return path
+
+
+class ParentArrays(ParentTable):
+    """
+    ParentTable for states that are integers below `size`, in arrays
+    that are reused from one search to the next. Bumping the generation
+    forgets every reached state at once, so a search costs nothing up
+    front however large the arrays are.
+
+    The stamps are kept in a list rather than an array, since a list's
+    bound __getitem__ is as quick as indexing it directly.
+    """
+
+    def __init__(self, size):
+        self.parent = array("i", [-1]) * size
+        self.movie = array("i", [-1]) * size
+        self.stamp = [0] * size
+        self.stamp_of = self.stamp.__getitem__
+        self.generation = 0
+
+    def reset(self):
+        self.generation += 1
+        return self.generation
+
+
+class SearchStats():
+    """
+    Counters for a single search, filled in when passed to a search
+    as `stats`; searches given none skip all of this bookkeeping.
+
+    `expanded` counts people whose neighbors were generated, `generated`
+    the (movie, person) pairs that produced, and `reached` the people
+    first reached through them, so `duplicates` counts the pairs that
+    were not pushed, mostly because the person had already been reached.
+    `peak_frontier` is the most people waiting to be expanded at once
+    and `elapsed` the wall time in seconds.
+    """
+
+    FIELDS = ("strategy", "cached", "degrees", "expanded", "generated",
+              "reached", "duplicates", "peak_frontier", "elapsed")
+
+    def __init__(self, strategy=None):
+        self.strategy = strategy
+        self.cached = False
+        self.degrees = None
+        self.expanded = 0
+        self.generated = 0
+        self.reached = 0
+        self.peak_frontier = 0
+        self.elapsed = 0.0
+
+    @property
+    def duplicates(self):
+        return self.generated - self.reached
+
+    def counting(self, neighbors):
+        """
+        Wraps a neighbor function to count expansions and generated pairs.
+        """
+        def expand(state):
+            self.expanded += 1
+            pairs = tuple(neighbors(state))
+            self.generated += len(pairs)
+            return pairs
+
+        return expand
+
+    def observe(self, frontier, reached):
+        """
+        Records the frontier size and how many people have been
+        reached so far, not counting where the search started.
+        """
+        if frontier > self.peak_frontier:
+            self.peak_frontier = frontier
+        self.reached = reached
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __str__(self):
+        parts = []
+        for field, value in self.as_dict().items():
+            if field == "elapsed":
+                parts.append(f"elapsed_ms={value * 1000:.3f}")
+            else:
+                parts.append(f"{field}={value}")
+        return " ".join(parts)
@@ -0,0 +1,562 @@
+"""
+Generalized m,n,k-games: players take turns on a board of m rows and n
+columns, and the first to get k in a row, column or diagonal wins.
+Tic-tac-toe is the 3,3,3-game; gomoku is 15,15,5.
+
+Game mirrors the functions of tictactoe.py for any board, with
+wins_at checking only the lines through the last move.
+
+Exhaustive minimax is hopeless beyond small boards, so Search runs
+iterative-deepening alpha-beta under a time budget. Positions beyond
+the depth limit are scored by a heuristic over every k-cell window:
+a window holding only one player's stones is worth 10^(c - 1) to them
+for c stones. The window counts, score and wins are updated
+incrementally as moves are made and unmade, so each move only touches
+the windows through its cell.
+
+ParallelSearch splits the root moves across a pool of processes.
+
+Usage: python mnk.py [rows cols k] [--budget SECONDS] [--workers N]
+"""
+
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from tictactoe import X, O, EMPTY
+
+# Directions a line can run in: along a row, a column and both diagonals
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside a search when its time budget runs out.
+    """
+
+
+class Game():
+    """
+    The rules of the m,n,k-game with `rows` rows, `cols` columns and
+    `k` in a row to win, for boards in the same list-of-lists form as
+    tictactoe.py.
+    """
+
+    def __init__(self, rows=3, cols=3, k=3):
+        if rows < 1 or cols < 1 or not 1 <= k <= max(rows, cols):
+            raise ValueError(f"No {rows},{cols},{k}-game")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+
+        # Every k-cell window a line can be won in, as flat cell
+        # indices r * cols + c, and the windows through each cell
+        self.windows = []
+        for dr, dc in DIRECTIONS:
+            for r in range(rows):
+                for c in range(cols):
+                    end_r = r + dr * (k - 1)
+                    end_c = c + dc * (k - 1)
+                    if 0 <= end_r < rows and 0 <= end_c < cols:
+                        self.windows.append(tuple(
+                            (r + dr * i) * cols + c + dc * i for i in range(k)
+                        ))
+        self.cell_windows = [[] for _ in range(rows * cols)]
+        for w, window in enumerate(self.windows):
+            for cell in window:
+                self.cell_windows[cell].append(w)
+
+        # Every cell, nearest the center first, the order searches
+        # consider equally promising moves in
+        self.cell_order = sorted(
+            range(rows * cols),
+            key=lambda cell: abs(2 * (cell // cols) - (rows - 1))
+            + abs(2 * (cell % cols) - (cols - 1))
+        )
+
+        # The cells around each cell, which searches consider moving to
+        self.neighbors = []
+        for r in range(rows):
+            for c in range(cols):
+                self.neighbors.append([
+                    nr * cols + nc
+                    for nr in range(max(0, r - 1), min(rows, r + 2))
+                    for nc in range(max(0, c - 1), min(cols, c + 2))
+                    if (nr, nc) != (r, c)
+                ])
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.cols for _ in range(self.rows)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        filled = sum(cell != EMPTY for row in board for cell in row)
+        return X if filled % 2 == 0 else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {
+            (i, j)
+            for i in range(self.rows) for j in range(self.cols)
+            if board[i][j] == EMPTY
+        }
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.rows and 0 <= j < self.cols) or board[i][j] != EMPTY:
+            raise ValueError("Invalid action")
+        board_copy = [row[:] for row in board]
+        board_copy[i][j] = self.player(board)
+        return board_copy
+
+    def wins_at(self, board, action):
+        """
+        Returns True if the stone at `action` completes k in a row,
+        checking only the lines through it.
+        """
+        i, j = action
+        stone = board[i][j]
+        if stone == EMPTY:
+            return False
+        for di, dj in DIRECTIONS:
+            run = 1
+            for sign in (1, -1):
+                r, c = i + sign * di, j + sign * dj
+                while (0 <= r < self.rows and 0 <= c < self.cols
+                       and board[r][c] == stone):
+                    run += 1
+                    r += sign * di
+                    c += sign * dj
+            if run >= self.k:
+                return True
+        return False
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        for window in self.windows:
+            first = board[window[0] // self.cols][window[0] % self.cols]
+            if first != EMPTY and all(
+                board[cell // self.cols][cell % self.cols] == first
+                for cell in window
+            ):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        if self.winner(board) is not None:
+            return True
+        return all(cell != EMPTY for row in board for cell in row)
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        win = self.winner(board)
+        if win == X:
+            return 1
+        elif win == O:
+            return -1
+        return 0
+
+
+class Search():
+    """
+    Iterative-deepening alpha-beta search of a Game.
+
+    Each call to `best_move` searches to odd depths only, so the player
+    to move always places the last stone, two plies deeper at a time
+    until `time_budget` seconds have passed or `max_depth` is reached
+    (either may be None), and answers with the best move of the deepest
+    search that finished. `max_depth` must therefore be odd. On boards
+    searched over every empty cell, the answer is exact once the depth
+    covers every empty cell or a forced win or loss is found, and
+    deepening stops there.
+
+    After a search, `depth` is the depth completed, `value` the best
+    move's score for the player who made it, and `nodes` the number of
+    positions searched.
+    """
+
+    def __init__(self, game, time_budget=1.0, max_depth=None):
+        if max_depth is not None and (max_depth < 1 or max_depth % 2 == 0):
+            raise ValueError(f"max_depth must be a positive odd number, not {max_depth}")
+        self.game = game
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+
+        # Scores of a window holding c stones of one player only
+        self.weights = [0] + [10 ** (c - 1) for c in range(1, game.k + 1)]
+        # Above any heuristic score, less the ply, so quicker wins score higher
+        self.win = 10 * len(game.windows) * self.weights[-1] + game.rows * game.cols
+        # Small boards are searched over every empty cell, larger ones
+        # only next to stones already played
+        self.local = game.rows * game.cols > 16
+
+        self.depth = 0
+        self.value = 0
+        self.nodes = 0
+
+    def best_move(self, board):
+        """
+        Returns the best action (i, j) found for the player to move,
+        or None if the game is over.
+        """
+        game = self.game
+        if game.terminal(board):
+            return None
+        self.load(board)
+        side = 1 if game.player(board) == X else -1
+
+        self.deadline = None
+        if self.time_budget is not None:
+            self.deadline = time.perf_counter() + self.time_budget
+        self.nodes = 0
+        self.depth = 0
+        self.killers = {}
+
+        moves = self.ordered_moves(side, 0)
+        best = moves[0]
+        limit = self.empties
+        if self.max_depth is not None:
+            limit = min(limit, self.max_depth)
+        # An even horizon leaves the opponent the last stone, which costs
+        # most where a stone meets the most windows, so it scores edge
+        # cells above central ones; deepen two plies at a time instead,
+        # unless the final depth plays the game out
+        depths = list(range(1, limit + 1, 2))
+        if limit == self.empties and limit % 2 == 0:
+            depths.append(limit)
+        for depth in depths:
+            try:
+                value, move = self.search_root(side, depth, moves)
+            except SearchTimeout:
+                break
+            best = move
+            self.depth = depth
+            self.value = value
+            # Try this depth's best move first at the next
+            moves.remove(move)
+            moves.insert(0, move)
+            # Searches of only the cells near stones may miss a defence
+            # elsewhere, so their wins and losses are not proven
+            if not self.local and abs(value) > self.win - game.rows * game.cols:
+                break
+        return divmod(best, game.cols)
+
+    def load(self, board):
+        """
+        Sets up the incremental state for searching from a board.
+        """
+        game = self.game
+        self.cells = [0] * (game.rows * game.cols)
+        self.counts = {1: [0] * len(game.windows), -1: [0] * len(game.windows)}
+        self.near = [0] * (game.rows * game.cols)
+        self.score = 0
+        self.empties = game.rows * game.cols
+        for i, row in enumerate(board):
+            for j, stone in enumerate(row):
+                if stone != EMPTY:
+                    self.make(i * game.cols + j, 1 if stone == X else -1)
+
+    def make(self, cell, side):
+        """
+        Plays `side` (1 for X, -1 for O) at a cell, updating the window
+        counts and score. Returns True if the move wins.
+        """
+        weights = self.weights
+        mine = self.counts[side]
+        theirs = self.counts[-side]
+        won = False
+        delta = 0
+        for w in self.game.cell_windows[cell]:
+            m = mine[w]
+            t = theirs[w]
+            if t == 0:
+                delta += weights[m + 1] - weights[m]
+                if m + 1 == self.game.k:
+                    won = True
+            elif m == 0:
+                # The window no longer counts for the other player
+                delta += weights[t]
+            mine[w] = m + 1
+        self.score += side * delta
+        self.cells[cell] = side
+        self.empties -= 1
+        for neighbor in self.game.neighbors[cell]:
+            self.near[neighbor] += 1
+        return won
+
+    def unmake(self, cell, side):
+        """
+        Takes back the move `make` made at a cell.
+        """
+        weights = self.weights
+        mine = self.counts[side]
+        theirs = self.counts[-side]
+        delta = 0
+        for w in self.game.cell_windows[cell]:
+            m = mine[w] - 1
+            t = theirs[w]
+            if t == 0:
+                delta += weights[m + 1] - weights[m]
+            elif m == 0:
+                delta += weights[t]
+            mine[w] = m
+        self.score -= side * delta
+        self.cells[cell] = 0
+        self.empties += 1
+        for neighbor in self.game.neighbors[cell]:
+            self.near[neighbor] -= 1
+
+    def ordered_moves(self, side, ply):
+        """
+        Returns the empty cells worth trying, the killer move for the
+        ply first and then by how much each would add to the player's
+        lines and take from the opponent's, nearest the center first
+        among equals.
+        """
+        cells = self.cells
+        near = self.near
+        order = self.game.cell_order
+        if self.local and self.empties < len(cells):
+            moves = [c for c in order if cells[c] == 0 and near[c]]
+        else:
+            moves = [c for c in order if cells[c] == 0]
+
+        weights = self.weights
+        mine = self.counts[side]
+        theirs = self.counts[-side]
+        cell_windows = self.game.cell_windows
+
+        def priority(cell):
+            p = 0
+            for w in cell_windows[cell]:
+                if theirs[w] == 0:
+                    p += weights[mine[w] + 1]
+                if mine[w] == 0:
+                    p += weights[theirs[w] + 1]
+            return p
+
+        moves.sort(key=priority, reverse=True)
+        killer = self.killers.get(ply)
+        if killer is not None and killer in moves:
+            moves.remove(killer)
+            moves.insert(0, killer)
+        return moves
+
+    def search_root(self, side, depth, moves):
+        """
+        Returns (value, move) for the best of `moves` searched to `depth`.
+        """
+        alpha = -self.win - 1
+        best = moves[0]
+        for cell in moves:
+            if self.make(cell, side):
+                v = self.win
+            else:
+                v = -self.negamax(-side, depth - 1, -self.win - 1, -alpha, 1)
+            self.unmake(cell, side)
+            if v > alpha:
+                alpha = v
+                best = cell
+        return alpha, best
+
+    def negamax(self, side, depth, alpha, beta, ply):
+        """
+        Returns the value of the position to `side`, the player to move,
+        searched `depth` more plies. Only exact strictly between alpha
+        and beta.
+        """
+        self.nodes += 1
+        if (self.deadline is not None and self.nodes & 1023 == 0
+                and time.perf_counter() > self.deadline):
+            raise SearchTimeout()
+        if self.empties == 0:
+            return 0
+        if depth == 0:
+            return side * self.score
+
+        best = -self.win - 1
+        for cell in self.ordered_moves(side, ply):
+            if self.make(cell, side):
+                v = self.win - ply
+            else:
+                v = -self.negamax(-side, depth - 1, -beta, -alpha, ply + 1)
+            self.unmake(cell, side)
+            if v > best:
+                best = v
+                if v > alpha:
+                    alpha = v
+                    if alpha >= beta:
+                        self.killers[ply] = cell
+                        break
+        return best
+
+
+# A worker process's Search and the bound it shares with the others
+worker_search = None
+worker_bound = None
+
+
+def init_worker(rows, cols, k, bound, time_budget, max_depth):
+    global worker_search, worker_bound
+    worker_search = Search(Game(rows, cols, k), time_budget, max_depth)
+    worker_bound = bound
+
+
+def search_move(board, side, cell, index, depth, deadline):
+    """
+    Returns (value, nodes) for the root move `cell`, the `index`th
+    tried, searched to `depth` in a worker, and shares its value if it
+    is the best so far. `deadline` is in time.time() seconds.
+    """
+    search = worker_search
+    search.load(board)
+    search.killers = {}
+    search.nodes = 0
+    search.deadline = None
+    if deadline is not None:
+        search.deadline = time.perf_counter() + deadline - time.time()
+
+    # Only a move that beats the best so far matters, or that ties it
+    # and was tried earlier, since ties go to the earlier move
+    with worker_bound.get_lock():
+        alpha, owner = worker_bound[0], worker_bound[1]
+    if owner > index:
+        alpha -= 1
+
+    if search.make(cell, side):
+        value = search.win
+    else:
+        value = -search.negamax(-side, depth - 1, -search.win - 1, -alpha, 1)
+    with worker_bound.get_lock():
+        if value > worker_bound[0] or (value == worker_bound[0]
+                                       and index < worker_bound[1]):
+            worker_bound[0] = value
+            worker_bound[1] = index
+    return value, search.nodes
+
+
+class ParallelSearch(Search):
+    """
+    Search that splits each iteration's root moves across `workers`
+    processes, after searching the first move itself (young brothers
+    wait) to get a bound for the rest.
+
+    The best value so far and the index of the move that found it are
+    shared between the processes, so each move is searched with the
+    tightest window known when it starts. A move only replaces the best
+    by beating it, or by tying it having been tried earlier, so the
+    answer is the same as Search's at the same depth. Call `close` when
+    done to stop the workers.
+    """
+
+    def __init__(self, game, time_budget=1.0, max_depth=None, workers=None):
+        super().__init__(game, time_budget, max_depth)
+        context = multiprocessing.get_context("spawn")
+        self.bound = context.Array("q", 2)
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers or multiprocessing.cpu_count(),
+            mp_context=context,
+            initializer=init_worker,
+            initargs=(game.rows, game.cols, game.k, self.bound,
+                      time_budget, max_depth)
+        )
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    def load(self, board):
+        super().load(board)
+        self.board = board
+
+    def search_root(self, side, depth, moves):
+        first = moves[0]
+        if self.make(first, side):
+            value = self.win
+        else:
+            value = -self.negamax(-side, depth - 1, -self.win - 1, self.win + 1, 1)
+        self.unmake(first, side)
+        if len(moves) == 1 or value == self.win:
+            return value, first
+
+        with self.bound.get_lock():
+            self.bound[0] = value
+            self.bound[1] = 0
+        deadline = None
+        if self.deadline is not None:
+            deadline = time.time() + self.deadline - time.perf_counter()
+        futures = [
+            self.executor.submit(search_move, self.board, side, cell, index,
+                                 depth, deadline)
+            for index, cell in enumerate(moves) if index > 0
+        ]
+        try:
+            for future in futures:
+                self.nodes += future.result()[1]
+        except SearchTimeout:
+            for future in futures:
+                future.cancel()
+            raise
+        return self.bound[0], moves[self.bound[1]]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python mnk.py [rows cols k] [--budget SECONDS] [--workers N]"
+    )
+    parser.add_argument("size", nargs="*", type=int, default=[7, 7, 4])
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="seconds the AI may think per move")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="search processes, or 0 to search in this one")
+    args = parser.parse_args()
+    if len(args.size) != 3:
+        parser.error("give rows, cols and k together")
+
+    game = Game(*args.size)
+    if args.workers > 0:
+        search = ParallelSearch(game, args.budget, workers=args.workers)
+    else:
+        search = Search(game, time_budget=args.budget)
+    board = game.initial_state()
+    win = None
+    try:
+        # Only the lines through each new stone can complete a win
+        for _ in range(game.rows * game.cols):
+            started = time.perf_counter()
+            move = search.best_move(board)
+            print(f"{game.player(board)} plays {move} (depth {search.depth}, "
+                  f"{search.nodes} positions, "
+                  f"{time.perf_counter() - started:.2f}s)")
+            board = game.result(board, move)
+            if game.wins_at(board, move):
+                win = board[move[0]][move[1]]
+                break
+    finally:
+        if args.workers > 0:
+            search.close()
+
+    for row in board:
+        print(" ".join(cell or "." for cell in row))
+    print(f"{win} wins." if win else "Draw.")
+
+
+if __name__ == "__main__":
+    main()
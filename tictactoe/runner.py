@@ -1,9 +1,18 @@
+import os
 import pygame
 import sys
 import time
 
 import tictactoe as ttt
 
+# Optionally choose the AI's engine: python runner.py [engine]
+if len(sys.argv) > 2 or (len(sys.argv) == 2 and sys.argv[1] not in ttt.ENGINES):
+    sys.exit(f"Usage: python runner.py [{'|'.join(ttt.ENGINES)}]")
+if len(sys.argv) == 2:
+    ttt.default_engine = sys.argv[1]
+if ttt.default_engine == "table" and not os.path.exists(ttt.SOLVED_PATH):
+    sys.exit("No solved-game table: run solve.py to write it, or use auto.")
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -0,0 +1,175 @@
+"""
+Headless self-play for measuring the tictactoe engines.
+
+Plays games with each engine in `tictactoe.ENGINES` across a pool of
+worker processes, without pygame or runner.py's delays, either the
+engine against itself or against a player choosing uniformly at random
+(the engine takes X in half the games and O in the rest). For each
+engine it reports games per second of wall time, positions searched per
+second of search time, and the latency of the engine's moves.
+
+Every engine plays perfectly, so the run fails if any game between two
+engines is not a draw, or if an engine ever loses to the random player.
+
+Each worker keeps its transposition table from game to game, as
+runner.py does; pass --cold to clear it before every game instead.
+Every engine gets a fresh pool of workers, so no engine starts with a
+table another engine filled.
+
+Usage: python selfplay.py [--games N] [--opponent ai|random] [--output FILE]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import tictactoe as ttt
+
+
+def play_game(engine, opponent, seed, cold=False):
+    """
+    Plays one game and returns (winner, the engine's move latencies in
+    seconds, positions the engine searched), run inside a worker.
+    """
+    rng = random.Random(seed)
+    if cold:
+        ttt.table.clear()
+    ttt.positions = 0
+    # Against the random player, the engine takes X or O by coin toss
+    engine_side = rng.choice((ttt.X, ttt.O)) if opponent == "random" else None
+
+    latencies = []
+    board = ttt.initial_state()
+    while not ttt.terminal(board):
+        if engine_side in (None, ttt.player(board)):
+            started = time.perf_counter()
+            move = ttt.minimax(board, engine)
+            latencies.append(time.perf_counter() - started)
+        else:
+            move = rng.choice(sorted(ttt.actions(board)))
+        board = ttt.result(board, move)
+
+    win = ttt.winner(board)
+    if win is not None and win != engine_side:
+        raise AssertionError(
+            f"{engine} lost as {ttt.O if win == ttt.X else ttt.X} "
+            f"against {opponent} (seed {seed})"
+        )
+    return win, latencies, ttt.positions
+
+
+def run_engine(executor, engine, games, opponent, seed, cold):
+    """
+    Plays `games` games with one engine and returns its figures.
+    """
+    started = time.perf_counter()
+    futures = [
+        executor.submit(play_game, engine, opponent, f"{seed}:{engine}:{game}", cold)
+        for game in range(games)
+    ]
+    outcomes = {"X": 0, "O": 0, "draw": 0}
+    latencies = []
+    positions = 0
+    for future in futures:
+        win, moves, searched = future.result()
+        outcomes[win or "draw"] += 1
+        latencies.extend(moves)
+        positions += searched
+    elapsed = time.perf_counter() - started
+
+    searching = sum(latencies)
+    latencies.sort()
+    return {
+        "games": games,
+        "seconds": round(elapsed, 6),
+        "games_per_second": round(games / elapsed, 3),
+        "outcomes": outcomes,
+        "moves": len(latencies),
+        "positions": positions,
+        "positions_per_second": round(positions / searching) if searching else None,
+        "mean_ms": round(1000 * searching / len(latencies), 4),
+        "p50_ms": round(1000 * percentile(latencies, 50), 4),
+        "p95_ms": round(1000 * percentile(latencies, 95), 4),
+        "p99_ms": round(1000 * percentile(latencies, 99), 4),
+        "max_ms": round(1000 * latencies[-1], 4),
+    }
+
+
+def percentile(ordered, percent):
+    index = round(percent / 100 * (len(ordered) - 1))
+    return ordered[index]
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python selfplay.py [--games N] [--opponent ai|random] "
+              "[--engines NAMES] [--workers N] [--cold] [--seed N] "
+              "[--output FILE]"
+    )
+    parser.add_argument("--games", type=int, default=200,
+                        help="games per engine (default 200)")
+    parser.add_argument("--opponent", choices=("ai", "random"), default="ai",
+                        help="play each engine against itself or at random")
+    parser.add_argument("--engines", default=",".join(ttt.ENGINES),
+                        type=lambda text: text.split(","),
+                        help="comma-separated engines (default all)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="game processes (default: one per CPU)")
+    parser.add_argument("--cold", action="store_true",
+                        help="clear the transposition table before each game")
+    parser.add_argument("--seed", type=int, default=50)
+    parser.add_argument("--output", help="write results here, not stdout")
+    args = parser.parse_args()
+
+    for engine in args.engines:
+        if engine not in ttt.ENGINES:
+            parser.error(f"unknown engine: {engine}")
+    engines = args.engines
+    if "table" in engines and not os.path.exists(ttt.SOLVED_PATH):
+        log("Skipping table: run solve.py to write the solved-game table.")
+        engines = [engine for engine in engines if engine != "table"]
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "opponent": args.opponent,
+        "workers": args.workers,
+        "cold": args.cold,
+        "seed": args.seed,
+        "engines": {},
+    }
+    for engine in engines:
+        log(f"Playing {args.games} games with {engine}...")
+        executor = ProcessPoolExecutor(
+            max_workers=args.workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        try:
+            results = run_engine(executor, engine, args.games,
+                                 args.opponent, args.seed, args.cold)
+        except AssertionError as e:
+            sys.exit(f"Not optimal: {e}")
+        finally:
+            executor.shutdown(cancel_futures=True)
+        report["engines"][engine] = results
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
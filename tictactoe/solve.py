@@ -0,0 +1,94 @@
+"""
+Writes the solved-game table behind the "table" engine, which the
+default "auto" engine also answers from whenever the table exists.
+
+Every position reachable from the initial state is enumerated and its
+minimax value and all of its optimal actions worked out bottom-up, so
+the AI never has to search at runtime. Before anything is written, every
+position is checked against the recursive max_value and min_value: the
+values must agree and the action they choose must be one of the optimal
+ones. The file is then read back and compared entry by entry.
+
+Usage: python solve.py [path]
+"""
+
+import sys
+
+import tictactoe as ttt
+
+
+def solve():
+    """
+    Returns a dictionary mapping the table index of every reachable
+    position to (board, value, optimal actions).
+    """
+    positions = {}
+
+    def value_of(board):
+        index = ttt.board_index(board)
+        if index in positions:
+            return positions[index][1]
+        if ttt.terminal(board):
+            positions[index] = (board, ttt.utility(board), set())
+            return positions[index][1]
+
+        values = {a: value_of(ttt.result(board, a)) for a in ttt.actions(board)}
+        best = max(values.values()) if ttt.player(board) == ttt.X else min(values.values())
+        positions[index] = (
+            board, best, {a for a, v in values.items() if v == best}
+        )
+        return best
+
+    value_of(ttt.initial_state())
+    return positions
+
+
+def verify(positions):
+    """
+    Checks every solved position against the recursive search.
+    """
+    for board, value, optimal in positions.values():
+        if ttt.terminal(board):
+            continue
+        if ttt.player(board) == ttt.X:
+            v, action = ttt.max_value(ttt.Position(board))
+        else:
+            v, action = ttt.min_value(ttt.Position(board))
+        if v != value or action not in optimal:
+            raise AssertionError(
+                f"{ttt.encode(board)}: solved {value} by {sorted(optimal)}, "
+                f"search gives {v} by {action}"
+            )
+
+
+def encode_entries(positions):
+    entries = [0] * ttt.SOLVED_ENTRIES
+    for index, (_, value, optimal) in positions.items():
+        entry = ttt.REACHABLE | ((value + 1) << ttt.VALUE_SHIFT)
+        for i, j in optimal:
+            entry |= 1 << (3 * i + j)
+        entries[index] = entry
+    return entries
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python solve.py [path]")
+    path = sys.argv[1] if len(sys.argv) == 2 else ttt.SOLVED_PATH
+
+    positions = solve()
+    print(f"Solved {len(positions)} positions.")
+    verify(positions)
+    print("Checked against max_value and min_value.")
+
+    entries = encode_entries(positions)
+    with open(path, "wb") as f:
+        f.write(ttt.SOLVED_MAGIC)
+        f.write(b"".join(entry.to_bytes(2, "little") for entry in entries))
+    if list(ttt.load_solved(path)) != entries:
+        raise AssertionError(f"{path} does not read back as written")
+    print(f"Wrote {path}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,135 @@ Tic Tac Toe Player
 
 import math
 import copy
+import os
+import sys
+from array import array
+from collections import OrderedDict
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Most positions the transposition table keeps; the whole game has
+# only 5,478 reachable positions, so by default none are ever evicted
+TABLE_SIZE = 10000
+
+
+class TranspositionTable():
+    """
+    Bounded cache of solved positions, mapping a board's encoding to
+    its (value, best action). Once it holds `maxsize` positions, the
+    least recently used one is evicted to make room.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns the (value, best action) stored for a key, or None.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# Solved positions shared by every search, across moves and games
+table = TranspositionTable(TABLE_SIZE)
+
+# Engine `minimax` uses when not given one, a key of ENGINES
+default_engine = "auto"
+
+# Cells in the order alpha-beta tries them: center, corners, then edges
+MOVE_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2),
+              (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# Bitboards give each player a 9-bit int with bit 3 * i + j set for
+# every cell (i, j) they hold
+FULL = 0b111111111
+LINES = [0b000000111, 0b000111000, 0b111000000,
+         0b001001001, 0b010010010, 0b100100100,
+         0b100010001, 0b001010100]
+MOVE_BITS = [1 << (3 * i + j) for i, j in MOVE_ORDER]
+
+# For each cell index 3 * i + j, the other two cells (i, j) of every
+# line through it
+CELL_LINES = [
+    [tuple(divmod(k, 3) for k in range(9) if line >> k & 1 and k != cell)
+     for line in LINES if line >> cell & 1]
+    for cell in range(9)
+]
+
+# The 8 symmetries of the board, as the cell index 3 * i + j that each
+# cell moves to: rotations by 0, 90, 180 and 270 degrees, then the
+# reflections in the middle row, middle column and both diagonals
+SYMMETRIES = [
+    [3 * a + b for a, b in (cell(i, j) for i in range(3) for j in range(3))]
+    for cell in (
+        lambda i, j: (i, j), lambda i, j: (j, 2 - i),
+        lambda i, j: (2 - i, 2 - j), lambda i, j: (2 - j, i),
+        lambda i, j: (2 - i, j), lambda i, j: (i, 2 - j),
+        lambda i, j: (j, i), lambda i, j: (2 - j, 2 - i),
+    )
+]
+# For each symmetry, the cell index that moves to each cell
+INVERSES = [
+    [symmetry.index(k) for k in range(9)] for symmetry in SYMMETRIES
+]
+
+# Solved-game table written by solve.py, with one 16-bit entry per board
+# indexed by its cells as base-3 digits (EMPTY 0, X 1, O 2). Bits 0-8
+# mark the optimal actions as in bitboards, bits 9-10 hold the value
+# plus one, and REACHABLE is set for every position a game can reach.
+SOLVED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "solved.table")
+SOLVED_MAGIC = b"TTTSOLV1"
+SOLVED_ENTRIES = 3 ** 9
+VALUE_SHIFT = 9
+REACHABLE = 1 << 15
+
+# Entries of the solved-game table once loaded, see table_search
+solved = None
+
+# Positions the engines have searched, for benchmarks to read and reset
+positions = 0
+
+# Whether a player's bits complete a line, for every possible 9 bits
+WINNING = bytes(
+    any(bits & line == line for line in LINES) for bits in range(FULL + 1)
+)
+
 
 def initial_state():
     """
@@ -109,44 +233,432 @@ def utility(board):
     elif win == "O":
         return -1
     return 0
-    
 
-def minimax(board):
+
+class Position():
+    """
+    A board that searches make and take back moves on in place, rather
+    than copying it with `result` for every move. The number of moves
+    made, the player to move, the empty cells (in MOVE_ORDER) and the
+    winner are kept up to date as moves are made, so none of them need
+    a scan of the board.
+
+    The board passed in is copied once, so boards from `result` are
+    never changed.
+    """
+
+    __slots__ = ("board", "moves", "turn", "empty", "won", "played", "slots")
+
+    def __init__(self, board):
+        self.board = [row[:] for row in board]
+        self.empty = [(i, j) for i, j in MOVE_ORDER if board[i][j] == EMPTY]
+        self.moves = 9 - len(self.empty)
+        self.turn = X if self.moves % 2 == 0 else O
+        self.won = winner(board)
+        # The moves made, and where each was in the empty list
+        self.played = []
+        self.slots = []
+
+    def make(self, action):
+        """
+        Makes move (i, j) for the player to move.
+        """
+        try:
+            slot = self.empty.index(action)
+        except ValueError:
+            raise ValueError("Invalid action") from None
+        if self.won is not None:
+            raise ValueError("Invalid action")
+        del self.empty[slot]
+        self.played.append(action)
+        self.slots.append(slot)
+
+        i, j = action
+        board = self.board
+        turn = self.turn
+        board[i][j] = turn
+        for (a, b), (c, d) in CELL_LINES[3 * i + j]:
+            if board[a][b] == turn and board[c][d] == turn:
+                self.won = turn
+                break
+        self.moves += 1
+        self.turn = O if turn == X else X
+
+    def unmake(self):
+        """
+        Takes back the last move made.
+        """
+        action = self.played.pop()
+        self.empty.insert(self.slots.pop(), action)
+        i, j = action
+        self.board[i][j] = EMPTY
+        self.won = None
+        self.moves -= 1
+        self.turn = O if self.turn == X else X
+
+    def terminal(self):
+        return self.won is not None or not self.empty
+
+    def utility(self):
+        if self.won is None:
+            return 0
+        return 1 if self.won == X else -1
+
+
+def encode(board):
+    """
+    Returns a key identifying the position on the board, such as "X-O------".
+    """
+    return "".join(cell or "-" for row in board for cell in row)
+
+
+def canonical(board):
+    """
+    Returns (key, symmetry): the least encoding of any of the board's
+    8 symmetric images, and the index of the symmetry producing it.
+    Symmetric positions share a key, so are only solved once.
+    """
+    cells = encode(board)
+    return min(
+        ("".join(cells[k] for k in inverse), s)
+        for s, inverse in enumerate(INVERSES)
+    )
+
+
+def transform(action, symmetry, inverse=False):
+    """
+    Returns where the action's cell moves under a symmetry,
+    or comes from if `inverse`.
+    """
+    if action is None:
+        return None
+    mapping = INVERSES[symmetry] if inverse else SYMMETRIES[symmetry]
+    return divmod(mapping[3 * action[0] + action[1]], 3)
+
+
+def distinct_actions(board, moves=None):
+    """
+    Returns the actions on the board, or the given `moves` in order,
+    leaving out any that some symmetry of the board maps onto one
+    already listed, since both lead to equivalent positions.
+    """
+    if moves is None:
+        moves = sorted(actions(board))
+    cells = encode(board)
+    stabilizer = [
+        symmetry for symmetry in SYMMETRIES[1:]
+        if all(cells[k] == cells[symmetry[k]] for k in range(9))
+    ]
+    if not stabilizer:
+        return moves
+
+    distinct = []
+    covered = set()
+    for i, j in moves:
+        k = 3 * i + j
+        if k in covered:
+            continue
+        distinct.append((i, j))
+        covered.add(k)
+        covered.update(symmetry[k] for symmetry in stabilizer)
+    return distinct
+
+
+def warm_table(board=None):
+    """
+    Solves every position reachable from the board, the initial
+    state by default, so later moves from them are table lookups.
+    """
+    if board is None:
+        board = initial_state()
+    if terminal(board):
+        return
+    if player(board) == X:
+        max_value(Position(board))
+    else:
+        min_value(Position(board))
+
+
+def minimax(board, engine=None):
+    """
+    Returns the optimal action for the current player on the board,
+    found by the named engine, or by `default_engine` if not given.
+    """
+    return ENGINES[engine or default_engine](board)
+
+
+def minimax_search(board):
     """
-    Returns the optimal action for the current player on the board.
+    Returns the optimal action found by full minimax search,
+    memoized in the transposition table.
     """
-    play = player(board)
+    position = Position(board)
     
-    if play == X:
-        _, best_act = max_value(board)
+    if position.turn == X:
+        _, best_act = max_value(position)
     else:
-        _, best_act = min_value(board)
+        _, best_act = min_value(position)
     
     return best_act
 
 
-def min_value(board):
-    if terminal(board):
-        return utility(board), None
+def min_value(position):
+    global positions
+    positions += 1
+    # The table holds each position's best action in its canonical image
+    key, symmetry = canonical(position.board)
+    entry = table.get(key)
+    if entry is not None:
+        return entry[0], transform(entry[1], symmetry, inverse=True)
+
+    if position.terminal():
+        return position.utility(), None
 
     v = 2
     best_act = None
-    for a in actions(board):
-        r, _ = max_value(result(board, a))
+    for a in distinct_actions(position.board, position.empty):
+        position.make(a)
+        r, _ = max_value(position)
+        position.unmake()
         if r < v:
             v = r
             best_act = a
+    table.put(key, (v, transform(best_act, symmetry)))
     return v, best_act
 
-def max_value(board):
-    if terminal(board):
-        return utility(board), None
+def max_value(position):
+    global positions
+    positions += 1
+    key, symmetry = canonical(position.board)
+    entry = table.get(key)
+    if entry is not None:
+        return entry[0], transform(entry[1], symmetry, inverse=True)
+
+    if position.terminal():
+        return position.utility(), None
     
     v = -2
     best_act = None
-    for a in actions(board):
-        r, _ = min_value(result(board, a))
+    for a in distinct_actions(position.board, position.empty):
+        position.make(a)
+        r, _ = min_value(position)
+        position.unmake()
         if r > v:
             v = r
             best_act = a
-    return v, best_act
\ No newline at end of file
+    table.put(key, (v, transform(best_act, symmetry)))
+    return v, best_act
+
+
+def alphabeta_search(board):
+    """
+    Returns the optimal action found by minimax with alpha-beta pruning.
+
+    Moves are tried in MOVE_ORDER, after any killer move: the move that
+    last cut off the search at the same depth, which often refutes its
+    siblings too. The window starts at the range of utilities, so a
+    forced win for the player to move ends the search of a position.
+    """
+    _, best_act = alphabeta_value(Position(board), -1, 1, {})
+    return best_act
+
+
+def alphabeta_value(position, alpha, beta, killers):
+    """
+    Returns (value, best action) for the position, where the value is
+    only exact if it lies strictly between alpha and beta.
+    `killers` maps a number of moves made to that depth's killer move.
+    """
+    global positions
+    positions += 1
+    if position.terminal():
+        return position.utility(), None
+
+    # Making and taking back a move leaves the empty list as it was,
+    # so it is only copied to put the killer move first
+    depth = position.moves
+    moves = position.empty
+    killer = killers.get(depth)
+    if killer is not None and killer != moves[0] and killer in moves:
+        moves = [killer] + [a for a in moves if a != killer]
+    moves = distinct_actions(position.board, moves)
+
+    maximizing = depth % 2 == 0
+    v = -2 if maximizing else 2
+    best_act = None
+    for a in moves:
+        position.make(a)
+        r, _ = alphabeta_value(position, alpha, beta, killers)
+        position.unmake()
+        if maximizing:
+            if r > v:
+                v = r
+                best_act = a
+            alpha = max(alpha, v)
+        else:
+            if r < v:
+                v = r
+                best_act = a
+            beta = min(beta, v)
+        if alpha >= beta:
+            killers[depth] = a
+            break
+    return v, best_act
+
+
+def to_bits(board):
+    """
+    Returns the board as (X bitboard, O bitboard).
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def from_bits(x, o):
+    """
+    Returns the list-of-lists board for a pair of bitboards.
+    """
+    board = initial_state()
+    for i in range(3):
+        for j in range(3):
+            bit = 1 << (3 * i + j)
+            if x & bit:
+                board[i][j] = X
+            elif o & bit:
+                board[i][j] = O
+    return board
+
+
+def bitboard_search(board):
+    """
+    Returns the optimal action found by alpha-beta search over
+    bitboards, where moves are bit operations and wins are table
+    lookups, so searching allocates nothing but ints.
+    """
+    global positions
+    positions += 1
+    x, o = to_bits(board)
+    if WINNING[x] or WINNING[o] or x | o == FULL:
+        return None
+    me, them = (x, o) if player(board) == X else (o, x)
+
+    best_bit = None
+    alpha = -2
+    for bit in MOVE_BITS:
+        if (me | them) & bit:
+            continue
+        v = 1 if WINNING[me | bit] else -bitboard_value(them, me | bit, -1, -alpha)
+        if v > alpha:
+            alpha = v
+            best_bit = bit
+            if v == 1:
+                break
+    return divmod(best_bit.bit_length() - 1, 3)
+
+
+def bitboard_value(me, them, alpha, beta):
+    """
+    Returns the value of a position to the player to move, 1 for a
+    win and -1 for a loss, given that `them` has not yet won.
+    Only exact if strictly between alpha and beta.
+    """
+    global positions
+    positions += 1
+    filled = me | them
+    if filled == FULL:
+        return 0
+    best = -2
+    for bit in MOVE_BITS:
+        if filled & bit:
+            continue
+        mine = me | bit
+        if WINNING[mine]:
+            return 1
+        v = -bitboard_value(them, mine, -beta, -alpha)
+        if v > best:
+            best = v
+            if v > alpha:
+                alpha = v
+                if alpha >= beta:
+                    break
+    return best
+
+
+def board_index(board):
+    """
+    Returns the board's entry in the solved-game table.
+    """
+    index = 0
+    for row in board:
+        for cell in row:
+            index = 3 * index + (1 if cell == X else 2 if cell == O else 0)
+    return index
+
+
+def load_solved(path=SOLVED_PATH):
+    """
+    Reads a solved-game table written by solve.py.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:len(SOLVED_MAGIC)] != SOLVED_MAGIC:
+        raise ValueError(f"{path} is not a solved-game table")
+    entries = array("H")
+    entries.frombytes(data[len(SOLVED_MAGIC):])
+    if len(entries) != SOLVED_ENTRIES:
+        raise ValueError(f"{path} is truncated")
+    if sys.byteorder != "little":
+        entries.byteswap()
+    return entries
+
+
+def table_search(board):
+    """
+    Returns an optimal action by looking the board up in the solved-game
+    table, preferring cells in MOVE_ORDER among equally good actions.
+    Run solve.py once to write the table.
+    """
+    global solved, positions
+    if solved is None:
+        solved = load_solved()
+    positions += 1
+    entry = solved[board_index(board)]
+    if not entry & REACHABLE:
+        raise ValueError("Unreachable board")
+    for bit in MOVE_BITS:
+        if entry & bit:
+            return divmod(bit.bit_length() - 1, 3)
+    return None
+
+
+def auto_search(board):
+    """
+    Returns an optimal action from the solved-game table if solve.py
+    has written one, so every move is a constant-time lookup, and from
+    the memoized minimax search otherwise.
+    """
+    global solved
+    if solved is None and os.path.exists(SOLVED_PATH):
+        try:
+            solved = load_solved()
+        except (OSError, ValueError):
+            pass
+    if solved is not None:
+        return table_search(board)
+    return minimax_search(board)
+
+
+# Search engines `minimax` can use, by name
+ENGINES = {
+    "auto": auto_search,
+    "minimax": minimax_search,
+    "alphabeta": alphabeta_search,
+    "bitboard": bitboard_search,
+    "table": table_search,
+}